@@ -1,5 +1,6 @@
 """Family finance planner package."""
 
+from .packed import PackedSnapshot, open_packed_snapshot, write_packed_snapshot
 from .planner import (
     load_snapshot_from_json,
     planned_monthly_budget_total,
@@ -11,6 +12,9 @@ from .planner import (
 )
 
 __all__ = [
+    "PackedSnapshot",
+    "open_packed_snapshot",
+    "write_packed_snapshot",
     "load_snapshot_from_json",
     "planned_monthly_budget_total",
     "render_report",
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import argparse
+import os
+from datetime import datetime
+
+from .auth import AuthStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Family finance database maintenance")
+    parser.add_argument("--db", default=os.getenv("FAMILY_FINANCE_DB", "family_finance.db"), help="Path to the database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rebuild-search-index", help="Rebuild the transaction description search index")
+    backfill = commands.add_parser("backfill-ledger", help="Date legacy transactions and build balance checkpoints")
+    backfill.add_argument(
+        "--posted-at",
+        type=datetime.fromisoformat,
+        help="ISO timestamp to assign to undated transactions (default: now, UTC)",
+    )
+    recurring = commands.add_parser("run-recurring", help="Post all due recurring transactions")
+    recurring.add_argument("--now", type=datetime.fromisoformat, help="Treat this ISO timestamp as the current time")
+    recurring.add_argument("--batch-size", type=int, default=500, help="Rules processed per commit")
+    args = parser.parse_args()
+
+    store = AuthStore(args.db)
+    if args.command == "rebuild-search-index":
+        store.rebuild_search_index()
+        print(f"Rebuilt transaction search index in {args.db}")
+    elif args.command == "backfill-ledger":
+        dated = store.backfill_ledger(args.posted_at)
+        print(f"Dated {dated} transactions and refreshed balance checkpoints in {args.db}")
+    elif args.command == "run-recurring":
+        created = store.run_recurring(args.now, batch_size=args.batch_size)
+        print(f"Posted {created} recurring transactions in {args.db}")
+
+
+if __name__ == "__main__":
+    main()
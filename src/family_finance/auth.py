@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import calendar
 import hashlib
 import os
+import re
 import secrets
 import sqlite3
 from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Account, AssetSegment, Budget, FinanceSnapshot, Household, HouseholdMember
 
 
 @dataclass(frozen=True)
@@ -32,11 +37,29 @@ class ManagedTransaction:
     kind: str
     amount: float
     description: str
+    posted_at: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RecurringRule:
+    id: int
+    user_id: int
+    account_id: int
+    kind: str
+    amount: float
+    description: str
+    cadence: str
+    starts_at: str
+    next_run_at: str
+
+
+RECURRING_CADENCES = ("daily", "weekly", "monthly")
 
 
 class AuthStore:
     def __init__(self, db_path: str | Path) -> None:
         self.db_path = str(db_path)
+        self._snapshot_cache: Dict[int, Tuple[int, FinanceSnapshot]] = {}
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
@@ -85,11 +108,183 @@ class AuthStore:
                     kind TEXT NOT NULL CHECK(kind IN ('income', 'expense')),
                     amount REAL NOT NULL,
                     description TEXT NOT NULL,
+                    posted_at TEXT,
                     FOREIGN KEY(user_id) REFERENCES users(id),
                     FOREIGN KEY(account_id) REFERENCES accounts(id)
                 )
                 """
             )
+            self._init_ledger(conn)
+            self._init_recurring(conn)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS segment_targets (
+                    user_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    target_pct REAL NOT NULL,
+                    PRIMARY KEY(user_id, name),
+                    FOREIGN KEY(user_id) REFERENCES users(id)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS account_allocations (
+                    account_id INTEGER NOT NULL,
+                    segment TEXT NOT NULL,
+                    pct REAL NOT NULL,
+                    PRIMARY KEY(account_id, segment),
+                    FOREIGN KEY(account_id) REFERENCES accounts(id)
+                )
+                """
+            )
+            self._init_search_index(conn)
+            self._init_data_versions(conn)
+
+    def _init_search_index(self, conn: sqlite3.Connection) -> None:
+        # External-content FTS5 index over transactions. The owner, account and
+        # kind are indexed as extra columns so filtered searches resolve
+        # entirely inside the index, newest rowid first.
+        existed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'"
+        ).fetchone()
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+                description, user_id, account_id, kind,
+                content='transactions', content_rowid='id', prefix='2 3'
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+                INSERT INTO transactions_fts(rowid, description, user_id, account_id, kind)
+                VALUES (new.id, new.description, new.user_id, new.account_id, new.kind);
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+                INSERT INTO transactions_fts(transactions_fts, rowid, description, user_id, account_id, kind)
+                VALUES ('delete', old.id, old.description, old.user_id, old.account_id, old.kind);
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS transactions_fts_update
+            AFTER UPDATE OF description, user_id, account_id, kind ON transactions BEGIN
+                INSERT INTO transactions_fts(transactions_fts, rowid, description, user_id, account_id, kind)
+                VALUES ('delete', old.id, old.description, old.user_id, old.account_id, old.kind);
+                INSERT INTO transactions_fts(rowid, description, user_id, account_id, kind)
+                VALUES (new.id, new.description, new.user_id, new.account_id, new.kind);
+            END
+            """
+        )
+        if existed is None:
+            conn.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+
+    def _init_ledger(self, conn: sqlite3.Connection) -> None:
+        # Databases created before posting timestamps get the column added in
+        # place; their existing rows stay NULL until backfill_ledger runs.
+        columns = {str(r["name"]) for r in conn.execute("PRAGMA table_info(transactions)").fetchall()}
+        if "posted_at" not in columns:
+            conn.execute("ALTER TABLE transactions ADD COLUMN posted_at TEXT")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transactions_account_posted ON transactions(account_id, posted_at)"
+        )
+        # A checkpoint holds the balance including every transaction posted
+        # strictly before checkpoint_at. Each account gets one when it is
+        # opened and one at the end of every completed month with postings;
+        # quiet months need none, since the scan from the previous
+        # checkpoint covers the same rows.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS balance_checkpoints (
+                account_id INTEGER NOT NULL,
+                checkpoint_at TEXT NOT NULL,
+                balance REAL NOT NULL,
+                PRIMARY KEY(account_id, checkpoint_at),
+                FOREIGN KEY(account_id) REFERENCES accounts(id)
+            )
+            """
+        )
+
+    def _init_recurring(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recurring_rules (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                account_id INTEGER NOT NULL,
+                kind TEXT NOT NULL CHECK(kind IN ('income', 'expense')),
+                amount REAL NOT NULL,
+                description TEXT NOT NULL,
+                cadence TEXT NOT NULL CHECK(cadence IN ('daily', 'weekly', 'monthly')),
+                starts_at TEXT NOT NULL,
+                next_index INTEGER NOT NULL DEFAULT 0,
+                next_run_at TEXT NOT NULL,
+                FOREIGN KEY(user_id) REFERENCES users(id),
+                FOREIGN KEY(account_id) REFERENCES accounts(id)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_recurring_rules_next_run ON recurring_rules(next_run_at)")
+        columns = {str(r["name"]) for r in conn.execute("PRAGMA table_info(transactions)").fetchall()}
+        if "recurring_rule_id" not in columns:
+            conn.execute("ALTER TABLE transactions ADD COLUMN recurring_rule_id INTEGER REFERENCES recurring_rules(id)")
+        # One transaction per rule occurrence, however often the scheduler
+        # is re-run or crashes mid-batch.
+        conn.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_recurring_occurrence
+            ON transactions(recurring_rule_id, posted_at) WHERE recurring_rule_id IS NOT NULL
+            """
+        )
+
+    def _init_data_versions(self, conn: sqlite3.Connection) -> None:
+        # Per-user counter bumped by triggers whenever anything that feeds
+        # build_snapshot changes, so cached snapshots are validated with a
+        # single lookup no matter which process wrote the change.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_data_versions (
+                user_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY(user_id) REFERENCES users(id)
+            )
+            """
+        )
+        bump = """
+            INSERT INTO user_data_versions(user_id, version) VALUES ({user}, 1)
+            ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+        """
+        owner = "(SELECT user_id FROM accounts WHERE id = {row}.account_id)"
+        watched = [
+            ("accounts", "INSERT", "new.user_id"),
+            ("accounts", "UPDATE", "new.user_id"),
+            ("accounts", "DELETE", "old.user_id"),
+            ("segment_targets", "INSERT", "new.user_id"),
+            ("segment_targets", "UPDATE", "new.user_id"),
+            ("segment_targets", "DELETE", "old.user_id"),
+            ("account_allocations", "INSERT", owner.format(row="new")),
+            ("account_allocations", "UPDATE", owner.format(row="new")),
+            ("account_allocations", "DELETE", owner.format(row="old")),
+        ]
+        for table, event, user in watched:
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    {bump.format(user=user)}
+                END
+                """
+            )
+
+    def rebuild_search_index(self) -> None:
+        with self._connect() as conn:
+            conn.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
 
     def register(self, username: str, password: str) -> bool:
         if not username or not password:
@@ -144,10 +339,14 @@ class AuthStore:
         if not name.strip() or not account_type.strip():
             return False
         with self._connect() as conn:
-            conn.execute(
+            cursor = conn.execute(
                 "INSERT INTO accounts(user_id, name, account_type, balance) VALUES (?, ?, ?, ?)",
                 (user_id, name.strip(), account_type.strip(), float(opening_balance)),
             )
+            conn.execute(
+                "INSERT INTO balance_checkpoints(account_id, checkpoint_at, balance) VALUES (?, ?, ?)",
+                (cursor.lastrowid, _timestamp(_utcnow()), float(opening_balance)),
+            )
         return True
 
     def list_accounts(self, user_id: int) -> List[ManagedAccount]:
@@ -167,7 +366,15 @@ class AuthStore:
             for r in rows
         ]
 
-    def create_transaction(self, user_id: int, account_id: int, kind: str, amount: float, description: str) -> bool:
+    def create_transaction(
+        self,
+        user_id: int,
+        account_id: int,
+        kind: str,
+        amount: float,
+        description: str,
+        posted_at: Optional[datetime] = None,
+    ) -> bool:
         if kind not in {"income", "expense"}:
             return False
         if amount <= 0:
@@ -184,21 +391,390 @@ class AuthStore:
                 return False
 
             signed_amount = float(amount) if kind == "income" else -float(amount)
+            posted = _timestamp(posted_at or _utcnow())
             conn.execute(
-                "INSERT INTO transactions(user_id, account_id, kind, amount, description) VALUES (?, ?, ?, ?, ?)",
-                (user_id, account_id, kind, float(amount), description.strip()),
+                """
+                INSERT INTO transactions(user_id, account_id, kind, amount, description, posted_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (user_id, account_id, kind, float(amount), description.strip(), posted),
             )
             conn.execute(
                 "UPDATE accounts SET balance = balance + ? WHERE id = ?",
                 (signed_amount, account_id),
             )
+            _apply_to_checkpoints(conn, [(signed_amount, account_id, posted)])
+            _roll_checkpoints(conn, {account_id: posted})
         return True
 
+    def import_transactions(self, user_id: int, rows: Iterable[Tuple]) -> int:
+        """Insert ``(account_id, kind, amount, description[, posted_at])`` rows in one commit."""
+        with self._connect() as conn:
+            owned = {
+                int(r["id"])
+                for r in conn.execute("SELECT id FROM accounts WHERE user_id = ?", (user_id,)).fetchall()
+            }
+            now = _timestamp(_utcnow())
+            inserts = []
+            postings = []
+            deltas: Dict[int, float] = {}
+            for account_id, kind, amount, description, *rest in rows:
+                if account_id not in owned or kind not in {"income", "expense"}:
+                    continue
+                if amount <= 0 or not description.strip():
+                    continue
+                posted = _timestamp(rest[0]) if rest and rest[0] is not None else now
+                inserts.append((user_id, account_id, kind, float(amount), description.strip(), posted))
+                signed_amount = float(amount) if kind == "income" else -float(amount)
+                postings.append((signed_amount, account_id, posted))
+                deltas[account_id] = deltas.get(account_id, 0.0) + signed_amount
+
+            conn.executemany(
+                """
+                INSERT INTO transactions(user_id, account_id, kind, amount, description, posted_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                inserts,
+            )
+            conn.executemany(
+                "UPDATE accounts SET balance = balance + ? WHERE id = ?",
+                [(delta, account_id) for account_id, delta in deltas.items()],
+            )
+            _apply_to_checkpoints(conn, postings)
+            _roll_checkpoints(conn, _earliest_postings(postings))
+        return len(inserts)
+
+    def balance_as_of(self, user_id: int, account_id: int, as_of: datetime) -> Optional[float]:
+        with self._connect() as conn:
+            if not _owns_account(conn, user_id, account_id):
+                return None
+            return _balance_as_of(conn, account_id, _timestamp(as_of))
+
+    def balance_series(
+        self, user_id: int, account_id: int, start: datetime, end: datetime, step: str = "month"
+    ) -> List[Tuple[str, float]]:
+        """Closing balance at the end of each day or month between ``start`` and ``end``.
+
+        Empty when the account has no checkpoints yet (see ``backfill_ledger``).
+        """
+        points = _series_points(start, end, step)
+        if not points:
+            return []
+        with self._connect() as conn:
+            if not _owns_account(conn, user_id, account_id):
+                return []
+            balance = _balance_as_of(conn, account_id, points[0])
+            if balance is None:
+                return []
+            rows = conn.execute(
+                """
+                SELECT posted_at, CASE kind WHEN 'income' THEN amount ELSE -amount END AS signed_amount
+                FROM transactions
+                WHERE account_id = ? AND posted_at > ? AND posted_at <= ?
+                ORDER BY posted_at
+                """,
+                (account_id, points[0], points[-1]),
+            ).fetchall()
+
+        series = [(points[0], balance)]
+        index = 0
+        for point in points[1:]:
+            while index < len(rows) and str(rows[index]["posted_at"]) <= point:
+                balance += float(rows[index]["signed_amount"])
+                index += 1
+            series.append((point, balance))
+        return series
+
+    def backfill_ledger(self, posted_at: Optional[datetime] = None) -> int:
+        """Date legacy transactions and create missing checkpoints; returns rows dated."""
+        stamp = _timestamp(posted_at or _utcnow())
+        with self._connect() as conn:
+            updated = conn.execute("UPDATE transactions SET posted_at = ? WHERE posted_at IS NULL", (stamp,)).rowcount
+            # Opening checkpoints for accounts that predate the ledger: the
+            # current balance minus everything ever posted, anchored at the
+            # earliest posting.
+            conn.execute(
+                """
+                INSERT INTO balance_checkpoints(account_id, checkpoint_at, balance)
+                SELECT a.id,
+                       COALESCE(MIN(t.posted_at), ?),
+                       a.balance - COALESCE(SUM(CASE t.kind WHEN 'income' THEN t.amount ELSE -t.amount END), 0)
+                FROM accounts a
+                LEFT JOIN transactions t ON t.account_id = a.id
+                WHERE NOT EXISTS (SELECT 1 FROM balance_checkpoints c WHERE c.account_id = a.id)
+                GROUP BY a.id
+                """,
+                (stamp,),
+            )
+            account_ids = [int(r["id"]) for r in conn.execute("SELECT id FROM accounts").fetchall()]
+            _roll_checkpoints(conn, dict.fromkeys(account_ids))
+        return updated
+
+    def search_transactions(
+        self,
+        user_id: int,
+        query: str,
+        account_id: Optional[int] = None,
+        kind: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[ManagedTransaction]:
+        match = _search_expression(query, user_id, account_id, kind)
+        if match is None:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT t.id, t.user_id, t.account_id, t.kind, t.amount, t.description, t.posted_at
+                FROM transactions_fts f
+                JOIN transactions t ON t.id = f.rowid
+                WHERE transactions_fts MATCH ?
+                ORDER BY f.rowid DESC
+                LIMIT ? OFFSET ?
+                """,
+                (match, max(int(limit), 0), max(int(offset), 0)),
+            ).fetchall()
+        return [
+            ManagedTransaction(
+                id=int(r["id"]),
+                user_id=int(r["user_id"]),
+                account_id=int(r["account_id"]),
+                kind=str(r["kind"]),
+                amount=float(r["amount"]),
+                description=str(r["description"]),
+                posted_at=r["posted_at"],
+            )
+            for r in rows
+        ]
+
+    def set_segment_target(self, user_id: int, name: str, target_pct: float) -> bool:
+        if not name.strip() or target_pct < 0 or target_pct > 100:
+            return False
+        with self._connect() as conn:
+            if target_pct == 0:
+                conn.execute("DELETE FROM segment_targets WHERE user_id = ? AND name = ?", (user_id, name.strip()))
+            else:
+                conn.execute(
+                    """
+                    INSERT INTO segment_targets(user_id, name, target_pct) VALUES (?, ?, ?)
+                    ON CONFLICT(user_id, name) DO UPDATE SET target_pct = excluded.target_pct
+                    """,
+                    (user_id, name.strip(), float(target_pct)),
+                )
+        return True
+
+    def set_account_allocation(self, user_id: int, account_id: int, segment: str, pct: float) -> bool:
+        if not segment.strip() or pct < 0 or pct > 100:
+            return False
+        with self._connect() as conn:
+            owner_row = conn.execute(
+                "SELECT id FROM accounts WHERE id = ? AND user_id = ?",
+                (account_id, user_id),
+            ).fetchone()
+            if owner_row is None:
+                return False
+            if pct == 0:
+                conn.execute(
+                    "DELETE FROM account_allocations WHERE account_id = ? AND segment = ?",
+                    (account_id, segment.strip()),
+                )
+            else:
+                conn.execute(
+                    """
+                    INSERT INTO account_allocations(account_id, segment, pct) VALUES (?, ?, ?)
+                    ON CONFLICT(account_id, segment) DO UPDATE SET pct = excluded.pct
+                    """,
+                    (account_id, segment.strip(), float(pct)),
+                )
+        return True
+
+    def build_snapshot(self, user_id: int) -> Optional[FinanceSnapshot]:
+        with self._connect() as conn:
+            user_row = conn.execute(
+                """
+                SELECT u.username, COALESCE(v.version, 0) AS version
+                FROM users u
+                LEFT JOIN user_data_versions v ON v.user_id = u.id
+                WHERE u.id = ?
+                """,
+                (user_id,),
+            ).fetchone()
+            if user_row is None:
+                return None
+            version = int(user_row["version"])
+            cached = self._snapshot_cache.get(user_id)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            account_rows = conn.execute(
+                "SELECT id, account_type, balance FROM accounts WHERE user_id = ? ORDER BY id",
+                (user_id,),
+            ).fetchall()
+            target_rows = conn.execute(
+                "SELECT name, target_pct FROM segment_targets WHERE user_id = ? ORDER BY name",
+                (user_id,),
+            ).fetchall()
+            allocation_rows = conn.execute(
+                """
+                SELECT a.id AS account_id, al.segment, al.pct
+                FROM account_allocations al
+                JOIN accounts a ON a.id = al.account_id
+                WHERE a.user_id = ?
+                ORDER BY a.id, al.segment
+                """,
+                (user_id,),
+            ).fetchall()
+
+        username = str(user_row["username"])
+        allocations: Dict[str, Dict[str, float]] = {}
+        for r in allocation_rows:
+            allocations.setdefault(str(r["account_id"]), {})[str(r["segment"])] = float(r["pct"])
+        accounts = [
+            Account(id=str(r["id"]), type=str(r["account_type"]), owners=[username], balance=float(r["balance"]))
+            for r in account_rows
+        ]
+        snapshot = FinanceSnapshot(
+            household=Household(
+                id=f"user_{user_id}",
+                name=username,
+                members=[HouseholdMember(user_id=username, role="owner")],
+            ),
+            accounts=accounts,
+            budget=Budget(period="current", shared_required=0.0, shared_flexible=0.0, personal={}),
+            asset_segments=[AssetSegment(name=str(r["name"]), target_pct=float(r["target_pct"])) for r in target_rows],
+            account_segment_allocations={
+                account.id: allocations.get(account.id, {"operations": 100.0}) for account in accounts
+            },
+        )
+        self._snapshot_cache[user_id] = (version, snapshot)
+        return snapshot
+
+    def create_recurring_rule(
+        self,
+        user_id: int,
+        account_id: int,
+        kind: str,
+        amount: float,
+        description: str,
+        cadence: str,
+        starts_at: Optional[datetime] = None,
+    ) -> Optional[int]:
+        if kind not in {"income", "expense"} or cadence not in RECURRING_CADENCES:
+            return None
+        if amount <= 0 or not description.strip():
+            return None
+        start = _timestamp(starts_at or _utcnow())
+        with self._connect() as conn:
+            if not _owns_account(conn, user_id, account_id):
+                return None
+            cursor = conn.execute(
+                """
+                INSERT INTO recurring_rules(
+                    user_id, account_id, kind, amount, description, cadence, starts_at, next_index, next_run_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)
+                """,
+                (user_id, account_id, kind, float(amount), description.strip(), cadence, start, start),
+            )
+        return cursor.lastrowid
+
+    def list_recurring_rules(self, user_id: int) -> List[RecurringRule]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, user_id, account_id, kind, amount, description, cadence, starts_at, next_run_at
+                FROM recurring_rules
+                WHERE user_id = ?
+                ORDER BY id
+                """,
+                (user_id,),
+            ).fetchall()
+        return [
+            RecurringRule(
+                id=int(r["id"]),
+                user_id=int(r["user_id"]),
+                account_id=int(r["account_id"]),
+                kind=str(r["kind"]),
+                amount=float(r["amount"]),
+                description=str(r["description"]),
+                cadence=str(r["cadence"]),
+                starts_at=str(r["starts_at"]),
+                next_run_at=str(r["next_run_at"]),
+            )
+            for r in rows
+        ]
+
+    def run_recurring(
+        self, now: Optional[datetime] = None, batch_size: int = 500, rule_ids: Optional[List[int]] = None
+    ) -> int:
+        """Materialize every occurrence due by ``now``; one commit per batch of rules.
+
+        ``rule_ids`` restricts the run to those rules, e.g. a rule just created
+        from a request, leaving everything else to the scheduler.
+        """
+        cutoff = _timestamp(now or _utcnow())
+        only = ""
+        if rule_ids is not None:
+            if not rule_ids:
+                return 0
+            only = f"AND r.id IN ({', '.join('?' for _ in rule_ids)})"
+        created = 0
+        while True:
+            conn = self._connect()
+            with conn:
+                # Take the write lock before reading due rules so concurrent
+                # schedulers serialize instead of racing on next_run_at.
+                conn.execute("BEGIN IMMEDIATE")
+                rules = conn.execute(
+                    f"""
+                    SELECT r.id, r.user_id, r.account_id, r.kind, r.amount, r.description,
+                           r.cadence, r.starts_at, r.next_index
+                    FROM recurring_rules r
+                    JOIN accounts a ON a.id = r.account_id AND a.user_id = r.user_id
+                    WHERE r.next_run_at <= ? {only}
+                    ORDER BY r.next_run_at
+                    LIMIT ?
+                    """,
+                    (cutoff, *(rule_ids or []), batch_size),
+                ).fetchall()
+                postings = []
+                deltas: Dict[int, float] = {}
+                advanced = []
+                for r in rules:
+                    index = int(r["next_index"])
+                    occurrence = _occurrence(str(r["starts_at"]), str(r["cadence"]), index)
+                    signed_amount = float(r["amount"]) if r["kind"] == "income" else -float(r["amount"])
+                    while occurrence <= cutoff:
+                        inserted = conn.execute(
+                            """
+                            INSERT OR IGNORE INTO transactions(
+                                user_id, account_id, kind, amount, description, posted_at, recurring_rule_id
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                            """,
+                            (r["user_id"], r["account_id"], r["kind"], r["amount"], r["description"], occurrence, r["id"]),
+                        ).rowcount
+                        if inserted:
+                            postings.append((signed_amount, int(r["account_id"]), occurrence))
+                            deltas[int(r["account_id"])] = deltas.get(int(r["account_id"]), 0.0) + signed_amount
+                        index += 1
+                        occurrence = _occurrence(str(r["starts_at"]), str(r["cadence"]), index)
+                    advanced.append((index, occurrence, r["id"]))
+
+                conn.executemany("UPDATE recurring_rules SET next_index = ?, next_run_at = ? WHERE id = ?", advanced)
+                conn.executemany(
+                    "UPDATE accounts SET balance = balance + ? WHERE id = ?",
+                    [(delta, account_id) for account_id, delta in deltas.items()],
+                )
+                _apply_to_checkpoints(conn, postings)
+                _roll_checkpoints(conn, _earliest_postings(postings))
+            created += len(postings)
+            if len(rules) < batch_size:
+                return created
+
     def list_transactions(self, user_id: int) -> List[ManagedTransaction]:
         with self._connect() as conn:
             rows = conn.execute(
                 """
-                SELECT id, user_id, account_id, kind, amount, description
+                SELECT id, user_id, account_id, kind, amount, description, posted_at
                 FROM transactions
                 WHERE user_id = ?
                 ORDER BY id DESC
@@ -213,11 +789,183 @@ class AuthStore:
                 kind=str(r["kind"]),
                 amount=float(r["amount"]),
                 description=str(r["description"]),
+                posted_at=r["posted_at"],
             )
             for r in rows
         ]
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _timestamp(value: datetime | str) -> str:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="seconds")
+
+
+def _month_start(stamp: str) -> str:
+    return f"{stamp[:7]}-01T00:00:00"
+
+
+def _next_month(stamp: str) -> str:
+    year, month = int(stamp[:4]), int(stamp[5:7])
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}-01T00:00:00"
+
+
+def _series_points(start: datetime, end: datetime, step: str) -> List[str]:
+    first, last = _timestamp(start), _timestamp(end)
+    points = []
+    if step == "day":
+        day = datetime.fromisoformat(first[:10])
+        while day.isoformat() <= last:
+            points.append((day + timedelta(days=1, seconds=-1)).isoformat(timespec="seconds"))
+            day += timedelta(days=1)
+    elif step == "month":
+        boundary = _month_start(first)
+        while boundary <= last:
+            following = _next_month(boundary)
+            points.append((datetime.fromisoformat(following) - timedelta(seconds=1)).isoformat(timespec="seconds"))
+            boundary = following
+    else:
+        raise ValueError(f"Unknown step: {step}")
+    return points
+
+
+def _occurrence(starts_at: str, cadence: str, index: int) -> str:
+    start = datetime.fromisoformat(starts_at)
+    if cadence == "daily":
+        return _timestamp(start + timedelta(days=index))
+    if cadence == "weekly":
+        return _timestamp(start + timedelta(weeks=index))
+    # Monthly rules keep their day of month, clamped to shorter months.
+    months = start.year * 12 + start.month - 1 + index
+    year, month = divmod(months, 12)
+    day = min(start.day, calendar.monthrange(year, month + 1)[1])
+    return _timestamp(start.replace(year=year, month=month + 1, day=day))
+
+
+def _owns_account(conn: sqlite3.Connection, user_id: int, account_id: int) -> bool:
+    row = conn.execute("SELECT id FROM accounts WHERE id = ? AND user_id = ?", (account_id, user_id)).fetchone()
+    return row is not None
+
+
+def _balance_as_of(conn: sqlite3.Connection, account_id: int, as_of: str) -> Optional[float]:
+    """Balance from the nearest checkpoint, or None for accounts that were never backfilled."""
+    signed = "CASE kind WHEN 'income' THEN amount ELSE -amount END"
+    checkpoint = conn.execute(
+        """
+        SELECT checkpoint_at, balance FROM balance_checkpoints
+        WHERE account_id = ? AND checkpoint_at <= ?
+        ORDER BY checkpoint_at DESC LIMIT 1
+        """,
+        (account_id, as_of),
+    ).fetchone()
+    if checkpoint is not None:
+        moved = conn.execute(
+            f"SELECT COALESCE(SUM({signed}), 0) FROM transactions WHERE account_id = ? AND posted_at >= ? AND posted_at <= ?",
+            (account_id, checkpoint["checkpoint_at"], as_of),
+        ).fetchone()[0]
+        return float(checkpoint["balance"]) + float(moved)
+
+    # Before the first checkpoint: roll the earliest one back instead.
+    checkpoint = conn.execute(
+        "SELECT checkpoint_at, balance FROM balance_checkpoints WHERE account_id = ? ORDER BY checkpoint_at LIMIT 1",
+        (account_id,),
+    ).fetchone()
+    if checkpoint is None:
+        return None
+    moved = conn.execute(
+        f"SELECT COALESCE(SUM({signed}), 0) FROM transactions WHERE account_id = ? AND posted_at > ? AND posted_at < ?",
+        (account_id, as_of, checkpoint["checkpoint_at"]),
+    ).fetchone()[0]
+    return float(checkpoint["balance"]) - float(moved)
+
+
+def _apply_to_checkpoints(conn: sqlite3.Connection, postings: List[Tuple[float, int, str]]) -> None:
+    # Backdated postings change every checkpoint taken after them.
+    conn.executemany(
+        "UPDATE balance_checkpoints SET balance = balance + ? WHERE account_id = ? AND checkpoint_at > ?",
+        postings,
+    )
+
+
+def _earliest_postings(postings: List[Tuple[float, int, str]]) -> Dict[int, Optional[str]]:
+    earliest: Dict[int, Optional[str]] = {}
+    for _, account_id, posted in postings:
+        current = earliest.get(account_id)
+        earliest[account_id] = posted if current is None else min(current, posted)
+    return earliest
+
+
+def _roll_checkpoints(conn: sqlite3.Connection, earliest: Dict[int, Optional[str]]) -> None:
+    """Write month-boundary checkpoints for completed months that had postings.
+
+    Each account is rolled forward from its latest checkpoint, or from the
+    month of its earliest new posting when that is older, so backdated
+    history gets checkpoints too.
+    """
+    limit = _month_start(_timestamp(_utcnow()))
+    checkpoints = []
+    for account_id, posted in earliest.items():
+        latest = conn.execute(
+            """
+            SELECT checkpoint_at, balance FROM balance_checkpoints
+            WHERE account_id = ? ORDER BY checkpoint_at DESC LIMIT 1
+            """,
+            (account_id,),
+        ).fetchone()
+        if latest is None:
+            continue
+        start, balance = str(latest["checkpoint_at"]), float(latest["balance"])
+        if posted is not None and posted < start:
+            # Existing checkpoints were already shifted by _apply_to_checkpoints,
+            # so the balance just before the affected month is exact.
+            start = _month_start(posted)
+            before = (datetime.fromisoformat(start) - timedelta(seconds=1)).isoformat(timespec="seconds")
+            balance = _balance_as_of(conn, account_id, before)
+        if start >= limit:
+            continue
+        months = conn.execute(
+            """
+            SELECT substr(posted_at, 1, 7) AS month, SUM(CASE kind WHEN 'income' THEN amount ELSE -amount END) AS moved
+            FROM transactions
+            WHERE account_id = ? AND posted_at >= ? AND posted_at < ?
+            GROUP BY month
+            ORDER BY month
+            """,
+            (account_id, start, limit),
+        ).fetchall()
+        for r in months:
+            balance += float(r["moved"])
+            checkpoints.append((account_id, _next_month(str(r["month"])), balance))
+    conn.executemany(
+        "INSERT OR REPLACE INTO balance_checkpoints(account_id, checkpoint_at, balance) VALUES (?, ?, ?)",
+        checkpoints,
+    )
+
+
+def _search_expression(
+    query: str, user_id: int, account_id: Optional[int], kind: Optional[str]
+) -> Optional[str]:
+    # Only word characters reach FTS5, so user input can never form query syntax.
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    phrases = [f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*']
+    clauses = [f"description : ({' '.join(phrases)})", f'user_id : "{int(user_id)}"']
+    if account_id is not None:
+        clauses.append(f'account_id : "{int(account_id)}"')
+    if kind is not None:
+        if kind not in {"income", "expense"}:
+            return None
+        clauses.append(f'kind : "{kind}"')
+    return " AND ".join(clauses)
+
+
 def _hash_password(password: str) -> str:
     salt = os.urandom(16)
     digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 120000)
@@ -3,16 +3,44 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from .planner import load_snapshot_from_json, render_report
+from .packed import is_packed_snapshot, load_snapshot_file, open_packed_snapshot, write_packed_snapshot
+from .planner import render_report
+from .profiling import Profiler
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Family finance planner report")
-    parser.add_argument("input", type=Path, help="Path to input JSON file")
+    parser.add_argument("input", type=Path, help="Path to input JSON or packed snapshot file")
+    parser.add_argument("--pack", type=Path, metavar="OUTPUT", help="Write the snapshot in packed binary form instead of reporting")
+    parser.add_argument("--profile", type=Path, metavar="DIR", help="Profile the run and write pstats/collapsed stacks to DIR")
+    parser.add_argument("--profile-keep", type=_positive_int, default=50, help="Number of profiles to retain in the profile directory")
     args = parser.parse_args()
 
-    raw = args.input.read_text(encoding="utf-8")
-    snapshot = load_snapshot_from_json(raw)
+    if args.profile is not None:
+        Profiler(args.profile, keep=args.profile_keep).run("cli", _run, args)
+    else:
+        _run(args)
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _run(args: argparse.Namespace) -> None:
+    if args.pack is None and is_packed_snapshot(args.input):
+        with open_packed_snapshot(args.input) as packed:
+            print(packed.render_report())
+        return
+
+    snapshot = load_snapshot_file(args.input)
+
+    if args.pack is not None:
+        write_packed_snapshot(snapshot, args.pack)
+        print(f"Wrote packed snapshot to {args.pack}")
+        return
     print(render_report(snapshot))
 
 
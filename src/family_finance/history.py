@@ -0,0 +1,424 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Account, AssetSegment, Budget, FinanceSnapshot, Household, HouseholdMember
+from .packed import is_packed_snapshot, load_snapshot_file
+from .planner import (
+    planned_monthly_budget_total,
+    segment_current_amounts,
+    segment_drift,
+    segment_target_amounts,
+    total_net_assets,
+)
+
+AccountState = Dict[str, Dict[str, object]]
+
+
+@dataclass(frozen=True)
+class PeriodSummary:
+    household_id: str
+    period: str
+    net_assets: float
+    planned_budget_total: float
+
+
+@dataclass(frozen=True)
+class SegmentPoint:
+    period: str
+    segment: str
+    current: float
+    target: float
+    drift: float
+
+
+class SnapshotHistory:
+    """Per-period household snapshots with precomputed aggregates.
+
+    Account rows are stored as deltas against the previous recorded period:
+    only new, changed or removed accounts are written, and unchanged fields
+    are left NULL.
+    """
+
+    def __init__(self, db_path: str | Path) -> None:
+        self.db_path = str(db_path)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS history_periods (
+                    household_id TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    net_assets REAL NOT NULL,
+                    planned_budget_total REAL NOT NULL,
+                    meta TEXT NOT NULL,
+                    PRIMARY KEY(household_id, period)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS history_segments (
+                    household_id TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    segment TEXT NOT NULL,
+                    current REAL NOT NULL,
+                    target REAL NOT NULL,
+                    drift REAL NOT NULL,
+                    PRIMARY KEY(household_id, segment, period)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS history_account_deltas (
+                    household_id TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    account_id TEXT NOT NULL,
+                    removed INTEGER NOT NULL DEFAULT 0,
+                    position INTEGER,
+                    account_type TEXT,
+                    owners TEXT,
+                    balance REAL,
+                    allocations TEXT,
+                    PRIMARY KEY(household_id, period, account_id)
+                )
+                """
+            )
+
+    def record(self, snapshot: FinanceSnapshot, period: Optional[str] = None) -> str:
+        return self.record_many([(snapshot, period)])[0]
+
+    def record_many(self, entries: Iterable[Tuple[FinanceSnapshot, Optional[str]]]) -> List[str]:
+        keyed = [(period or snapshot.budget.period, snapshot) for snapshot, period in entries]
+        # Appending in period order lets each delta reuse the state built for
+        # the previous entry instead of replaying the stored history.
+        keyed.sort(key=lambda item: (item[1].household.id, item[0]))
+        latest: Dict[str, Tuple[str, AccountState]] = {}
+        with self._connect() as conn:
+            for period, snapshot in keyed:
+                household_id = snapshot.household.id
+                state = _account_state(snapshot)
+                self._write_period(conn, snapshot, period, state, latest.get(household_id))
+                latest[household_id] = (period, state)
+        return [period for period, _ in keyed]
+
+    def _write_period(
+        self,
+        conn: sqlite3.Connection,
+        snapshot: FinanceSnapshot,
+        period: str,
+        state: AccountState,
+        cached: Optional[Tuple[str, AccountState]],
+    ) -> None:
+        household_id = snapshot.household.id
+        previous_period = conn.execute(
+            "SELECT MAX(period) FROM history_periods WHERE household_id = ? AND period < ?",
+            (household_id, period),
+        ).fetchone()[0]
+        if previous_period is None:
+            previous_state: AccountState = {}
+        elif cached is not None and cached[0] == previous_period:
+            previous_state = cached[1]
+        else:
+            previous_state = _replay(conn, household_id, previous_period)
+
+        next_period = conn.execute(
+            "SELECT MIN(period) FROM history_periods WHERE household_id = ? AND period > ?",
+            (household_id, period),
+        ).fetchone()[0]
+        next_state = _replay(conn, household_id, next_period) if next_period is not None else None
+
+        for table in ("history_periods", "history_segments", "history_account_deltas"):
+            conn.execute(f"DELETE FROM {table} WHERE household_id = ? AND period = ?", (household_id, period))
+
+        conn.execute(
+            """
+            INSERT INTO history_periods(household_id, period, net_assets, planned_budget_total, meta)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                household_id,
+                period,
+                total_net_assets(snapshot),
+                planned_monthly_budget_total(snapshot),
+                json.dumps(_snapshot_meta(snapshot)),
+            ),
+        )
+        targets = segment_target_amounts(snapshot)
+        current = segment_current_amounts(snapshot)
+        conn.executemany(
+            """
+            INSERT INTO history_segments(household_id, period, segment, current, target, drift)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (household_id, period, name, current.get(name, 0.0), targets.get(name, 0.0), drift)
+                for name, drift in sorted(segment_drift(snapshot).items())
+            ],
+        )
+        _write_delta(conn, household_id, period, previous_state, state)
+
+        if next_state is not None:
+            conn.execute(
+                "DELETE FROM history_account_deltas WHERE household_id = ? AND period = ?",
+                (household_id, next_period),
+            )
+            _write_delta(conn, household_id, next_period, state, next_state)
+
+    def periods(self, household_id: str) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT period FROM history_periods WHERE household_id = ? ORDER BY period",
+                (household_id,),
+            ).fetchall()
+        return [str(r["period"]) for r in rows]
+
+    def net_assets_trend(
+        self, household_id: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[PeriodSummary]:
+        where, params = _range_clause(household_id, start, end)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT household_id, period, net_assets, planned_budget_total
+                FROM history_periods
+                WHERE {where}
+                ORDER BY period
+                """,
+                params,
+            ).fetchall()
+        return [
+            PeriodSummary(
+                household_id=str(r["household_id"]),
+                period=str(r["period"]),
+                net_assets=float(r["net_assets"]),
+                planned_budget_total=float(r["planned_budget_total"]),
+            )
+            for r in rows
+        ]
+
+    def segment_drift_trend(
+        self,
+        household_id: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        segment: Optional[str] = None,
+    ) -> Dict[str, List[SegmentPoint]]:
+        where, params = _range_clause(household_id, start, end)
+        if segment is not None:
+            where += " AND segment = ?"
+            params.append(segment)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT period, segment, current, target, drift
+                FROM history_segments
+                WHERE {where}
+                ORDER BY segment, period
+                """,
+                params,
+            ).fetchall()
+        trend: Dict[str, List[SegmentPoint]] = {}
+        for r in rows:
+            trend.setdefault(str(r["segment"]), []).append(
+                SegmentPoint(
+                    period=str(r["period"]),
+                    segment=str(r["segment"]),
+                    current=float(r["current"]),
+                    target=float(r["target"]),
+                    drift=float(r["drift"]),
+                )
+            )
+        return trend
+
+    def snapshot_at(self, household_id: str, period: str) -> Optional[FinanceSnapshot]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT meta FROM history_periods WHERE household_id = ? AND period = ?",
+                (household_id, period),
+            ).fetchone()
+            if row is None:
+                return None
+            state = _replay(conn, household_id, period)
+        meta = json.loads(row["meta"])
+        return FinanceSnapshot(
+            household=Household(
+                id=household_id,
+                name=meta["name"],
+                members=[HouseholdMember(**m) for m in meta["members"]],
+            ),
+            accounts=[
+                Account(id=account_id, type=str(acc["type"]), owners=list(acc["owners"]), balance=float(acc["balance"]))
+                for account_id, acc in state.items()
+            ],
+            budget=Budget(**meta["budget"]),
+            asset_segments=[AssetSegment(**seg) for seg in meta["asset_segments"]],
+            account_segment_allocations={account_id: dict(acc["allocations"]) for account_id, acc in state.items()},
+        )
+
+
+def _account_state(snapshot: FinanceSnapshot) -> AccountState:
+    return {
+        account.id: {
+            "position": position,
+            "type": account.type,
+            "owners": list(account.owners),
+            "balance": float(account.balance),
+            "allocations": dict(snapshot.account_segment_allocations.get(account.id, {"operations": 100.0})),
+        }
+        for position, account in enumerate(snapshot.accounts)
+    }
+
+
+def _snapshot_meta(snapshot: FinanceSnapshot) -> Dict[str, object]:
+    return {
+        "name": snapshot.household.name,
+        "members": [{"user_id": m.user_id, "role": m.role} for m in snapshot.household.members],
+        "budget": {
+            "period": snapshot.budget.period,
+            "shared_required": snapshot.budget.shared_required,
+            "shared_flexible": snapshot.budget.shared_flexible,
+            "personal": dict(snapshot.budget.personal),
+        },
+        "asset_segments": [{"name": s.name, "target_pct": s.target_pct} for s in snapshot.asset_segments],
+    }
+
+
+def _write_delta(
+    conn: sqlite3.Connection, household_id: str, period: str, previous: AccountState, current: AccountState
+) -> None:
+    rows = []
+    for account_id, acc in current.items():
+        before = previous.get(account_id)
+        if before == acc:
+            continue
+
+        def changed(field: str):
+            if before is not None and before[field] == acc[field]:
+                return None
+            return acc[field]
+
+        owners = changed("owners")
+        allocations = changed("allocations")
+        rows.append(
+            (
+                household_id,
+                period,
+                account_id,
+                0,
+                changed("position"),
+                changed("type"),
+                json.dumps(owners) if owners is not None else None,
+                changed("balance"),
+                json.dumps(allocations) if allocations is not None else None,
+            )
+        )
+    for account_id in previous.keys() - current.keys():
+        rows.append((household_id, period, account_id, 1, None, None, None, None, None))
+    conn.executemany(
+        """
+        INSERT INTO history_account_deltas(
+            household_id, period, account_id, removed, position, account_type, owners, balance, allocations
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+
+
+def _replay(conn: sqlite3.Connection, household_id: str, period: str) -> AccountState:
+    rows = conn.execute(
+        """
+        SELECT account_id, removed, position, account_type, owners, balance, allocations
+        FROM history_account_deltas
+        WHERE household_id = ? AND period <= ?
+        ORDER BY period
+        """,
+        (household_id, period),
+    ).fetchall()
+    state: AccountState = {}
+    for r in rows:
+        account_id = str(r["account_id"])
+        if r["removed"]:
+            state.pop(account_id, None)
+            continue
+        acc = dict(state.get(account_id, {}))
+        if r["position"] is not None:
+            acc["position"] = int(r["position"])
+        if r["account_type"] is not None:
+            acc["type"] = str(r["account_type"])
+        if r["owners"] is not None:
+            acc["owners"] = json.loads(r["owners"])
+        if r["balance"] is not None:
+            acc["balance"] = float(r["balance"])
+        if r["allocations"] is not None:
+            acc["allocations"] = json.loads(r["allocations"])
+        state[account_id] = acc
+    return dict(sorted(state.items(), key=lambda item: item[1]["position"]))
+
+
+def _range_clause(household_id: str, start: Optional[str], end: Optional[str]) -> Tuple[str, List[object]]:
+    where = "household_id = ?"
+    params: List[object] = [household_id]
+    if start is not None:
+        where += " AND period >= ?"
+        params.append(start)
+    if end is not None:
+        where += " AND period <= ?"
+        params.append(end)
+    return where, params
+
+
+def load_snapshot_directory(
+    directory: Path, period_from_filename: bool = False
+) -> Tuple[List[Tuple[FinanceSnapshot, Optional[str]]], List[Tuple[Path, str]]]:
+    """Load ``*.json`` and packed snapshots; returns entries plus skipped files with reasons."""
+    entries: List[Tuple[FinanceSnapshot, Optional[str]]] = []
+    skipped: List[Tuple[Path, str]] = []
+    for path in sorted(p for p in directory.iterdir() if p.is_file()):
+        if path.suffix.lower() != ".json" and not is_packed_snapshot(path):
+            skipped.append((path, "not a JSON or packed snapshot"))
+            continue
+        try:
+            snapshot = load_snapshot_file(path)
+        except (ValueError, KeyError, TypeError, AttributeError, IndexError) as exc:
+            skipped.append((path, f"invalid snapshot: {exc}"))
+            continue
+        entries.append((snapshot, path.stem if period_from_filename else None))
+    return entries, skipped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest historical finance snapshots")
+    parser.add_argument("db", type=Path, help="Path to the history database")
+    parser.add_argument("directory", type=Path, help="Directory of JSON or packed snapshot files")
+    parser.add_argument(
+        "--period-from-filename",
+        action="store_true",
+        help="Use each file's stem as its period instead of the snapshot's budget period",
+    )
+    args = parser.parse_args()
+
+    entries, skipped = load_snapshot_directory(args.directory, args.period_from_filename)
+    for path, reason in skipped:
+        print(f"Skipped {path}: {reason}", file=sys.stderr)
+    history = SnapshotHistory(args.db)
+    recorded = history.record_many(entries)
+    print(f"Recorded {len(recorded)} snapshots into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from .auth import AuthStore
+from .web import WebApp
+
+ROUTE_MIX = {"login": 1, "dashboard": 5, "transaction": 3, "report": 1}
+PASSWORD = "loadtest-pw"
+REPORT_SNAPSHOT = json.dumps(
+    {
+        "household": {"id": "fam_load", "name": "Load Test Family", "members": [{"user_id": "u1", "role": "owner"}]},
+        "accounts": [
+            {"id": "acc_check", "type": "checking", "owners": ["u1"], "balance": 12000},
+            {"id": "acc_brokerage", "type": "brokerage", "owners": ["u1"], "balance": 88000},
+        ],
+        "budget": {"period": "2026-02", "shared": {"required": 4000, "flexible": 1500}, "personal": {"u1": 300}},
+        "asset_segments": [{"name": "operations", "target_pct": 20}, {"name": "long_term", "target_pct": 80}],
+        "account_segment_allocations": {"acc_check": {"operations": 100}, "acc_brokerage": {"long_term": 100}},
+    }
+)
+DESCRIPTIONS = ["Salary", "Rent", "Groceries", "Coffee", "Fuel", "Insurance", "Gym", "Streaming", "Pharmacy"]
+
+
+def seed_database(
+    db_path: str | Path,
+    users: int = 10,
+    accounts_per_user: int = 2,
+    transactions_per_account: int = 100,
+    seed: int = 0,
+) -> List[str]:
+    rng = random.Random(seed)
+    store = AuthStore(db_path)
+    usernames = []
+    for i in range(users):
+        username = f"load_user_{i}"
+        created = store.register(username, PASSWORD)
+        user = store.user_for_token(store.authenticate(username, PASSWORD) or "")
+        if user is None:
+            continue
+        usernames.append(username)
+        if not created:
+            continue
+        for j in range(accounts_per_user):
+            store.create_account(user.id, f"Account {j}", rng.choice(["checking", "savings", "brokerage"]), 1000)
+        rows = [
+            (account.id, rng.choice(["income", "expense"]), round(rng.uniform(1, 500), 2), rng.choice(DESCRIPTIONS))
+            for account in store.list_accounts(user.id)
+            for _ in range(transactions_per_account)
+        ]
+        store.import_transactions(user.id, rows)
+    return usernames
+
+
+class _InProcessTransport:
+    def __init__(self, app: WebApp) -> None:
+        self.app = app
+
+    def request(self, method: str, path: str, body: str = "", cookie: str = "") -> Tuple[int, Dict[str, str]]:
+        data = body.encode("utf-8")
+        environ = {
+            "PATH_INFO": path,
+            "REQUEST_METHOD": method,
+            "QUERY_STRING": "",
+            "CONTENT_LENGTH": str(len(data)),
+            "wsgi.input": BytesIO(data),
+            "HTTP_COOKIE": cookie,
+        }
+        captured: Dict[str, object] = {}
+
+        def start_response(status, headers):
+            captured["status"] = status
+            captured["headers"] = headers
+
+        b"".join(self.app(environ, start_response))
+        return int(str(captured["status"]).split(" ", 1)[0]), dict(captured["headers"])
+
+
+class _SocketTransport:
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+
+    def request(self, method: str, path: str, body: str = "", cookie: str = "") -> Tuple[int, Dict[str, str]]:
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            headers = {"Content-Type": "application/x-www-form-urlencoded"}
+            if cookie:
+                headers["Cookie"] = cookie
+            conn.request(method, path, body=body.encode("utf-8"), headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status, dict(response.getheaders())
+        finally:
+            conn.close()
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+class _Client:
+    def __init__(self, transport, username: str, rng: random.Random) -> None:
+        self.transport = transport
+        self.username = username
+        self.rng = rng
+        self.cookie = ""
+        self.account_ids: List[int] = []
+
+    def login(self) -> bool:
+        status, headers = self.transport.request(
+            "POST", "/login", urlencode({"username": self.username, "password": PASSWORD})
+        )
+        cookie = headers.get("Set-Cookie", "")
+        if status != 302 or not cookie.startswith("session="):
+            return False
+        self.cookie = cookie.split(";", maxsplit=1)[0]
+        return True
+
+    def call(self, route: str) -> bool:
+        if route == "login":
+            return self.login()
+        if route == "dashboard":
+            status, _ = self.transport.request("GET", "/dashboard", cookie=self.cookie)
+            return status == 200
+        if route == "transaction":
+            payload = urlencode(
+                {
+                    "account_id": str(self.rng.choice(self.account_ids)) if self.account_ids else "0",
+                    "kind": self.rng.choice(["income", "expense"]),
+                    "amount": f"{self.rng.uniform(1, 200):.2f}",
+                    "description": self.rng.choice(DESCRIPTIONS),
+                }
+            )
+            status, headers = self.transport.request("POST", "/transactions", payload, cookie=self.cookie)
+            return status == 302 and headers.get("Location") == "/dashboard"
+        if route == "report":
+            status, _ = self.transport.request(
+                "POST", "/report", urlencode({"snapshot_json": REPORT_SNAPSHOT}), cookie=self.cookie
+            )
+            return status == 200
+        raise ValueError(f"Unknown route: {route}")
+
+
+def run_load_test(
+    db_path: str | Path,
+    usernames: List[str],
+    clients: int = 4,
+    requests_per_client: int = 100,
+    mode: str = "inprocess",
+    seed: int = 0,
+) -> Dict[str, object]:
+    app = WebApp(db_path)
+    store = AuthStore(db_path)
+    server = None
+    if mode == "inprocess":
+        transport = _InProcessTransport(app)
+    elif mode == "socket":
+        server = make_server("127.0.0.1", 0, app, server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        transport = _SocketTransport("127.0.0.1", server.server_port)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    routes = list(ROUTE_MIX)
+    weights = [ROUTE_MIX[r] for r in routes]
+    latencies: Dict[str, List[float]] = {route: [] for route in routes}
+    errors: Dict[str, int] = {route: 0 for route in routes}
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        client = _Client(transport, usernames[index % len(usernames)], rng)
+        if client.login():
+            token = client.cookie.split("=", 1)[1]
+            user = store.user_for_token(token)
+            client.account_ids = [a.id for a in store.list_accounts(user.id)] if user else []
+        local: Dict[str, List[Tuple[float, bool]]] = {route: [] for route in routes}
+        for _ in range(requests_per_client):
+            route = rng.choices(routes, weights)[0]
+            started = time.perf_counter()
+            try:
+                ok = client.call(route)
+            except Exception:  # noqa: BLE001
+                ok = False
+            local[route].append((time.perf_counter() - started, ok))
+        with lock:
+            for route, samples in local.items():
+                latencies[route].extend(elapsed for elapsed, _ in samples)
+                errors[route] += sum(1 for _, ok in samples if not ok)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+    report: Dict[str, object] = {
+        "mode": mode,
+        "clients": clients,
+        "requests_per_client": requests_per_client,
+        "duration_s": round(elapsed, 4),
+        "routes": {route: _summarize(latencies[route], errors[route], elapsed) for route in routes},
+    }
+    all_latencies = [value for values in latencies.values() for value in values]
+    report["total"] = _summarize(all_latencies, sum(errors.values()), elapsed)
+    return report
+
+
+def _summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, object]:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": _percentile_ms(ordered, 50),
+        "p95_ms": _percentile_ms(ordered, 95),
+        "p99_ms": _percentile_ms(ordered, 99),
+    }
+
+
+def _percentile_ms(ordered: List[float], pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    rank = max(math.ceil(pct * len(ordered) / 100) - 1, 0)
+    return round(ordered[rank] * 1000, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the family finance web app")
+    parser.add_argument("db", type=Path, help="Path to the database to seed and test against")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--accounts-per-user", type=int, default=2)
+    parser.add_argument("--transactions-per-account", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=4, help="Number of concurrent clients")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client")
+    parser.add_argument("--mode", choices=["inprocess", "socket"], default="inprocess")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this path instead of stdout")
+    args = parser.parse_args()
+
+    usernames = seed_database(
+        args.db,
+        users=args.users,
+        accounts_per_user=args.accounts_per_user,
+        transactions_per_account=args.transactions_per_account,
+        seed=args.seed,
+    )
+    report = run_load_test(
+        args.db, usernames, clients=args.clients, requests_per_client=args.requests, mode=args.mode, seed=args.seed
+    )
+    rendered = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    else:
+        print(rendered)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import math
+import mmap
+import struct
+import sys
+from array import array
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .models import Account, AssetSegment, Budget, FinanceSnapshot, Household, HouseholdMember
+from .planner import format_report, load_snapshot_from_json
+
+# Layout (all sections 8-byte aligned, native byte order recorded in the header):
+#   header       MAGIC, byte order, counts
+#   float64      balances[n_accounts]
+#   float64      allocations[n_accounts * n_segments] (row per account, NaN = not allocated)
+#   float64      target_pct[n_declared_segments]
+#   float64      budget[2 + n_personal] (shared_required, shared_flexible, personal...)
+#   uint32       string references and owner offsets
+#   uint32       string offsets[n_strings + 1], followed by the UTF-8 string blob
+MAGIC = b"FFSNAP01"
+_HEADER = struct.Struct("<8sB7xIIIIIIII")
+_LITTLE, _BIG = 1, 2
+_ABSENT = float("nan")
+
+
+class PackedSnapshot:
+    """Read-only view over a memory-mapped packed snapshot.
+
+    Numeric columns are exposed as memoryviews into the mapping, so the
+    aggregates below run without materializing per-account objects.
+
+    The columns are only valid until ``close()``. Slices or other views a
+    caller derives from them keep the mapping alive: ``close()`` still
+    succeeds, and the file is unmapped once the last such view is released.
+    Copy values out (``list(packed.balances)``) to keep them past the block.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self._mmap: Optional[mmap.mmap] = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+        try:
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self) -> None:
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"{self.path} is not a packed snapshot")
+        (
+            magic,
+            order,
+            n_strings,
+            n_accounts,
+            n_segments,
+            n_declared,
+            n_members,
+            n_personal,
+            n_owner_links,
+            blob_len,
+        ) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a packed snapshot")
+        self._swap = order != (_LITTLE if sys.byteorder == "little" else _BIG)
+
+        self.account_count = n_accounts
+        self.segment_count = n_segments
+        offset = _HEADER.size
+        self.balances, offset = self._column("d", offset, n_accounts)
+        self.allocations, offset = self._column("d", offset, n_accounts * n_segments)
+        self.target_pcts, offset = self._column("d", offset, n_declared)
+        self._budget, offset = self._column("d", offset, 2 + n_personal)
+
+        refs_len = 3 + 2 * n_accounts + (n_accounts + 1) + n_owner_links + n_segments + 2 * n_members + n_personal
+        self._refs, offset = self._column("I", offset, refs_len)
+        self._offsets, offset = self._column("I", offset, n_strings + 1)
+        if offset + blob_len > len(self._mmap):
+            raise ValueError(f"{self.path} is truncated")
+        self._blob = memoryview(self._mmap)[offset : offset + blob_len]
+        self._views.append(self._blob)
+
+        # Per-account string columns are decoded lazily; only the small
+        # household/segment tables are resolved up front.
+        self._account_ids_at = 3
+        self._account_types_at = 3 + n_accounts
+        self._owner_offsets_at = 3 + 2 * n_accounts
+        self._owner_links_at = self._owner_offsets_at + n_accounts + 1
+        self._owner_link_count = n_owner_links
+        cursor = self._owner_links_at + n_owner_links
+
+        self.household_id, self.household_name, self.budget_period = self._strings(0, 3)
+        self.segment_names = self._strings(cursor, n_segments)
+        self.declared_segment_names = self.segment_names[:n_declared]
+        cursor += n_segments
+        self._member_ids = self._strings(cursor, n_members)
+        self._member_roles = self._strings(cursor + n_members, n_members)
+        self._personal_users = self._strings(cursor + 2 * n_members, n_personal)
+
+    def _string(self, index: int) -> str:
+        if index >= len(self._offsets) - 1:
+            raise ValueError(f"{self.path} has a string reference out of range")
+        start, end = self._offsets[index], self._offsets[index + 1]
+        if start > end or end > len(self._blob):
+            raise ValueError(f"{self.path} has a corrupt string table")
+        return str(self._blob[start:end], "utf-8")
+
+    def _strings(self, start: int, count: int) -> List[str]:
+        refs = self._refs
+        if start + count > len(refs):
+            raise ValueError(f"{self.path} has a corrupt reference table")
+        return [self._string(refs[i]) for i in range(start, start + count)]
+
+    @cached_property
+    def account_ids(self) -> List[str]:
+        return self._strings(self._account_ids_at, self.account_count)
+
+    @cached_property
+    def account_types(self) -> List[str]:
+        return self._strings(self._account_types_at, self.account_count)
+
+    @cached_property
+    def account_owners(self) -> List[List[str]]:
+        refs = self._refs
+        start = self._owner_offsets_at
+        bounds = refs[start : start + self.account_count + 1]
+        if any(a > b for a, b in zip(bounds, bounds[1:])) or bounds[-1] > self._owner_link_count:
+            raise ValueError(f"{self.path} has a corrupt owner table")
+        return [
+            self._strings(self._owner_links_at + refs[start + i], refs[start + i + 1] - refs[start + i])
+            for i in range(self.account_count)
+        ]
+
+    def _column(self, code: str, offset: int, count: int):
+        size = struct.calcsize(code) * count
+        end = offset + size
+        if end > len(self._mmap):
+            raise ValueError(f"{self.path} is truncated")
+        if self._swap:
+            values = array(code)
+            values.frombytes(self._mmap[offset:end])
+            values.byteswap()
+            view = memoryview(values)
+        else:
+            view = memoryview(self._mmap)[offset:end].cast(code)
+        self._views.append(view)
+        return view, _align(end)
+
+    def close(self) -> None:
+        if self._mmap is None:
+            return
+        for view in self._views:
+            try:
+                view.release()
+            except BufferError:
+                pass
+        self._views.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a derived view; dropping our reference lets
+            # the mapping be unmapped when that view goes away.
+            pass
+        self._mmap = None
+
+    def __enter__(self) -> "PackedSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def total_net_assets(self) -> float:
+        return sum(self.balances)
+
+    def segment_target_amounts(self) -> Dict[str, float]:
+        total = self.total_net_assets()
+        return {name: total * (pct / 100.0) for name, pct in zip(self.declared_segment_names, self.target_pcts)}
+
+    def segment_current_amounts(self) -> Dict[str, float]:
+        current: Dict[str, float] = {}
+        width = self.segment_count
+        balances = self.balances
+        allocations = self.allocations
+        for row in range(self.account_count):
+            balance = balances[row]
+            base = row * width
+            for col in range(width):
+                pct = allocations[base + col]
+                if math.isnan(pct):
+                    continue
+                name = self.segment_names[col]
+                current[name] = current.get(name, 0.0) + balance * (pct / 100.0)
+        return current
+
+    def segment_drift(self) -> Dict[str, float]:
+        target = self.segment_target_amounts()
+        current = self.segment_current_amounts()
+        names = set(target.keys()) | set(current.keys())
+        return {name: current.get(name, 0.0) - target.get(name, 0.0) for name in names}
+
+    def planned_monthly_budget_total(self) -> float:
+        return self._budget[0] + self._budget[1] + sum(self._budget[2:])
+
+    def render_report(self) -> str:
+        """Same text as ``planner.render_report`` without materializing the snapshot."""
+        return format_report(
+            household_name=self.household_name,
+            household_id=self.household_id,
+            member_count=len(self._member_ids),
+            account_count=self.account_count,
+            total_assets=self.total_net_assets(),
+            budget_period=self.budget_period,
+            shared_required=self._budget[0],
+            shared_flexible=self._budget[1],
+            personal_total=sum(self._budget[2:]),
+            planned_total=self.planned_monthly_budget_total(),
+            targets=self.segment_target_amounts(),
+            current=self.segment_current_amounts(),
+            drift=self.segment_drift(),
+        )
+
+    def to_snapshot(self) -> FinanceSnapshot:
+        width = self.segment_count
+        allocations: Dict[str, Dict[str, float]] = {}
+        for row, account_id in enumerate(self.account_ids):
+            base = row * width
+            allocations[account_id] = {
+                self.segment_names[col]: self.allocations[base + col]
+                for col in range(width)
+                if not math.isnan(self.allocations[base + col])
+            }
+        return FinanceSnapshot(
+            household=Household(
+                id=self.household_id,
+                name=self.household_name,
+                members=[HouseholdMember(user_id=u, role=r) for u, r in zip(self._member_ids, self._member_roles)],
+            ),
+            accounts=[
+                Account(id=account_id, type=account_type, owners=list(owners), balance=balance)
+                for account_id, account_type, owners, balance in zip(
+                    self.account_ids, self.account_types, self.account_owners, self.balances
+                )
+            ],
+            budget=Budget(
+                period=self.budget_period,
+                shared_required=self._budget[0],
+                shared_flexible=self._budget[1],
+                personal=dict(zip(self._personal_users, self._budget[2:])),
+            ),
+            asset_segments=[
+                AssetSegment(name=name, target_pct=pct) for name, pct in zip(self.declared_segment_names, self.target_pcts)
+            ],
+            account_segment_allocations=allocations,
+        )
+
+
+def write_packed_snapshot(snapshot: FinanceSnapshot, path: str | Path) -> None:
+    strings: List[str] = []
+    index: Dict[str, int] = {}
+
+    def ref(value: str) -> int:
+        if value not in index:
+            index[value] = len(strings)
+            strings.append(value)
+        return index[value]
+
+    targets = {segment.name: float(segment.target_pct) for segment in snapshot.asset_segments}
+    segment_names = list(targets)
+    rows: List[Dict[str, float]] = []
+    for account in snapshot.accounts:
+        row = snapshot.account_segment_allocations.get(account.id, {"operations": 100.0})
+        rows.append(row)
+        for name in row:
+            if name not in segment_names:
+                segment_names.append(name)
+    column = {name: i for i, name in enumerate(segment_names)}
+
+    balances = array("d", (float(account.balance) for account in snapshot.accounts))
+    allocations = array("d", [_ABSENT]) * (len(rows) * len(segment_names))
+    for i, row in enumerate(rows):
+        for name, pct in row.items():
+            allocations[i * len(segment_names) + column[name]] = float(pct)
+    target_pcts = array("d", targets.values())
+    personal = snapshot.budget.personal
+    budget = array("d", [float(snapshot.budget.shared_required), float(snapshot.budget.shared_flexible)])
+    budget.extend(float(v) for v in personal.values())
+
+    refs = array("I", [ref(snapshot.household.id), ref(snapshot.household.name), ref(snapshot.budget.period)])
+    refs.extend(ref(account.id) for account in snapshot.accounts)
+    refs.extend(ref(account.type) for account in snapshot.accounts)
+    owner_links: List[int] = []
+    refs.append(0)
+    for account in snapshot.accounts:
+        owner_links.extend(ref(owner) for owner in account.owners)
+        refs.append(len(owner_links))
+    refs.extend(owner_links)
+    refs.extend(ref(name) for name in segment_names)
+    refs.extend(ref(member.user_id) for member in snapshot.household.members)
+    refs.extend(ref(member.role) for member in snapshot.household.members)
+    refs.extend(ref(user_id) for user_id in personal)
+
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = array("I", [0])
+    for chunk in encoded:
+        offsets.append(offsets[-1] + len(chunk))
+    blob = b"".join(encoded)
+
+    header = _HEADER.pack(
+        MAGIC,
+        _LITTLE if sys.byteorder == "little" else _BIG,
+        len(strings),
+        len(snapshot.accounts),
+        len(segment_names),
+        len(targets),
+        len(snapshot.household.members),
+        len(personal),
+        len(owner_links),
+        len(blob),
+    )
+    with open(path, "wb") as handle:
+        _write_aligned(handle, header)
+        for section in (balances, allocations, target_pcts, budget, refs, offsets):
+            _write_aligned(handle, section.tobytes())
+        handle.write(blob)
+
+
+def open_packed_snapshot(path: str | Path) -> PackedSnapshot:
+    return PackedSnapshot(path)
+
+
+def is_packed_snapshot(path: str | Path) -> bool:
+    with open(path, "rb") as handle:
+        return handle.read(len(MAGIC)) == MAGIC
+
+
+def load_snapshot_file(path: str | Path) -> FinanceSnapshot:
+    if is_packed_snapshot(path):
+        with open_packed_snapshot(path) as packed:
+            return packed.to_snapshot()
+    return load_snapshot_from_json(Path(path).read_text(encoding="utf-8"))
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _write_aligned(handle, data: bytes) -> None:
+    handle.write(data)
+    padding = _align(handle.tell()) - handle.tell()
+    if padding:
+        handle.write(b"\0" * padding)
@@ -73,21 +73,48 @@ def planned_monthly_budget_total(snapshot: FinanceSnapshot) -> float:
 
 
 def render_report(snapshot: FinanceSnapshot) -> str:
-    total_assets = total_net_assets(snapshot)
-    targets = segment_target_amounts(snapshot)
-    current = segment_current_amounts(snapshot)
-    drift = segment_drift(snapshot)
+    return format_report(
+        household_name=snapshot.household.name,
+        household_id=snapshot.household.id,
+        member_count=len(snapshot.household.members),
+        account_count=len(snapshot.accounts),
+        total_assets=total_net_assets(snapshot),
+        budget_period=snapshot.budget.period,
+        shared_required=snapshot.budget.shared_required,
+        shared_flexible=snapshot.budget.shared_flexible,
+        personal_total=sum(snapshot.budget.personal.values()),
+        planned_total=planned_monthly_budget_total(snapshot),
+        targets=segment_target_amounts(snapshot),
+        current=segment_current_amounts(snapshot),
+        drift=segment_drift(snapshot),
+    )
+
 
+def format_report(
+    household_name: str,
+    household_id: str,
+    member_count: int,
+    account_count: int,
+    total_assets: float,
+    budget_period: str,
+    shared_required: float,
+    shared_flexible: float,
+    personal_total: float,
+    planned_total: float,
+    targets: Dict[str, float],
+    current: Dict[str, float],
+    drift: Dict[str, float],
+) -> str:
     lines: List[str] = []
-    lines.append(f"Household: {snapshot.household.name} ({snapshot.household.id})")
-    lines.append(f"Members: {len(snapshot.household.members)} | Accounts: {len(snapshot.accounts)}")
+    lines.append(f"Household: {household_name} ({household_id})")
+    lines.append(f"Members: {member_count} | Accounts: {account_count}")
     lines.append(f"Total net assets: ${total_assets:,.2f}")
     lines.append("")
-    lines.append(f"Budget period: {snapshot.budget.period}")
-    lines.append(f"Shared required: ${snapshot.budget.shared_required:,.2f}")
-    lines.append(f"Shared flexible: ${snapshot.budget.shared_flexible:,.2f}")
-    lines.append(f"Personal discretionary total: ${sum(snapshot.budget.personal.values()):,.2f}")
-    lines.append(f"Planned monthly total: ${planned_monthly_budget_total(snapshot):,.2f}")
+    lines.append(f"Budget period: {budget_period}")
+    lines.append(f"Shared required: ${shared_required:,.2f}")
+    lines.append(f"Shared flexible: ${shared_flexible:,.2f}")
+    lines.append(f"Personal discretionary total: ${personal_total:,.2f}")
+    lines.append(f"Planned monthly total: ${planned_total:,.2f}")
     lines.append("")
     lines.append("Segment allocations:")
 
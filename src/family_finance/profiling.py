@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import cProfile
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = re.compile(r"(?:^|&)profile=1(?:&|$)")
+
+
+class Profiler:
+    """Runs selected calls under cProfile plus a stack sampler.
+
+    Each profiled call writes ``<stamp>-<label>.pstats`` (for pstats/snakeviz)
+    and ``<stamp>-<label>.collapsed`` (for flamegraph.pl/speedscope) into
+    ``directory``; only the newest ``keep`` profiles are retained.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        keep: int = 50,
+        sample_rate: float = 0.0,
+        sample_interval: float = 0.001,
+    ) -> None:
+        if keep < 1:
+            raise ValueError(f"keep must be at least 1, got {keep}")
+        self.directory = Path(directory)
+        self.keep = keep
+        self.sample_rate = sample_rate
+        self.sample_interval = sample_interval
+        # cProfile can only be active for one call at a time per process.
+        self._run_lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def should_profile(self, environ: Dict[str, object]) -> bool:
+        if environ.get(PROFILE_HEADER) == "1":
+            return True
+        if PROFILE_PARAM.search(str(environ.get("QUERY_STRING", ""))):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def run(self, label: str, func: Callable[..., T], *args, **kwargs) -> T:
+        with self._run_lock:
+            sampler = _StackSampler(threading.get_ident(), self.sample_interval)
+            profile = cProfile.Profile()
+            sampler.start()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                sampler.stop()
+                self._write(label, profile, sampler.stacks)
+
+    def _write(self, label: str, profile: cProfile.Profile, stacks: Counter) -> None:
+        stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{time.time_ns() % 1_000_000_000:09d}-{_safe_label(label)}"
+        profile.dump_stats(str(self.directory / f"{stem}.pstats"))
+        collapsed = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        (self.directory / f"{stem}.collapsed").write_text(collapsed, encoding="utf-8")
+        self._enforce_retention()
+
+    def _enforce_retention(self) -> None:
+        stems = sorted({p.stem for p in self.directory.glob("*.pstats")})
+        for stem in stems[: max(len(stems) - self.keep, 0)]:
+            for suffix in (".pstats", ".collapsed"):
+                (self.directory / f"{stem}{suffix}").unlink(missing_ok=True)
+
+
+class _StackSampler(threading.Thread):
+    def __init__(self, target_ident: int, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+def profiler_from_env(environ: Dict[str, str]) -> Optional[Profiler]:
+    directory = environ.get("FAMILY_FINANCE_PROFILE_DIR")
+    if not directory:
+        return None
+    return Profiler(
+        directory,
+        keep=int(environ.get("FAMILY_FINANCE_PROFILE_KEEP", "50")),
+        sample_rate=float(environ.get("FAMILY_FINANCE_PROFILE_RATE", "0")),
+    )
+
+
+def _safe_label(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "profile"
@@ -2,19 +2,32 @@ from __future__ import annotations
 
 import html
 import os
+import sys
+import threading
 from pathlib import Path
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, urlencode
 from wsgiref.simple_server import make_server
 
 from .auth import AuthStore, User
 from .planner import load_snapshot_from_json, render_report
+from .profiling import Profiler, profiler_from_env
+
+
+SEARCH_PAGE_SIZE = 50
 
 
 class WebApp:
-    def __init__(self, db_path: str | Path = "family_finance.db") -> None:
+    def __init__(self, db_path: str | Path = "family_finance.db", profiler: Profiler | None = None) -> None:
         self.auth = AuthStore(db_path)
+        self.profiler = profiler
 
     def __call__(self, environ, start_response):
+        if self.profiler is not None and self.profiler.should_profile(environ):
+            label = f"{environ.get('REQUEST_METHOD', 'GET')} {environ.get('PATH_INFO', '/')}"
+            return self.profiler.run(label, self._dispatch, environ, start_response)
+        return self._dispatch(environ, start_response)
+
+    def _dispatch(self, environ, start_response):
         path = environ.get("PATH_INFO", "/")
         method = environ.get("REQUEST_METHOD", "GET")
         token = _cookie_value(environ.get("HTTP_COOKIE", ""), "session")
@@ -82,6 +95,67 @@ class WebApp:
                 return self._response(start_response, self._dashboard_html(user, "Could not create transaction."))
             return self._redirect(start_response, "/dashboard")
 
+        if path == "/recurring" and method == "POST":
+            if user is None:
+                return self._redirect(start_response, "/login")
+            params = _post_params(environ)
+            kind = params.get("kind", [""])[0]
+            description = params.get("description", [""])[0]
+            cadence = params.get("cadence", [""])[0]
+            try:
+                account_id = int(params.get("account_id", ["0"])[0])
+                amount = float(params.get("amount", ["0"])[0])
+            except ValueError:
+                return self._response(start_response, self._dashboard_html(user, "Invalid account or amount."))
+            rule_id = self.auth.create_recurring_rule(user.id, account_id, kind, amount, description, cadence)
+            if rule_id is None:
+                return self._response(start_response, self._dashboard_html(user, "Could not create recurring transaction."))
+            # Post only the new rule's first occurrence; other rules are the
+            # background scheduler's job.
+            self.auth.run_recurring(rule_ids=[rule_id])
+            return self._redirect(start_response, "/dashboard")
+
+        if path == "/segments" and method == "POST":
+            if user is None:
+                return self._redirect(start_response, "/login")
+            params = _post_params(environ)
+            name = params.get("name", [""])[0]
+            try:
+                target_pct = float(params.get("target_pct", ["0"])[0])
+            except ValueError:
+                return self._response(start_response, self._dashboard_html(user, "Target percentage must be numeric."))
+            if not self.auth.set_segment_target(user.id, name, target_pct):
+                return self._response(start_response, self._dashboard_html(user, "Could not save segment target."))
+            return self._redirect(start_response, "/dashboard")
+
+        if path == "/allocations" and method == "POST":
+            if user is None:
+                return self._redirect(start_response, "/login")
+            params = _post_params(environ)
+            segment = params.get("segment", [""])[0]
+            try:
+                account_id = int(params.get("account_id", ["0"])[0])
+                pct = float(params.get("pct", ["0"])[0])
+            except ValueError:
+                return self._response(start_response, self._dashboard_html(user, "Invalid account or percentage."))
+            if not self.auth.set_account_allocation(user.id, account_id, segment, pct):
+                return self._response(start_response, self._dashboard_html(user, "Could not save allocation."))
+            return self._redirect(start_response, "/dashboard")
+
+        if path == "/transactions/search" and method == "GET":
+            if user is None:
+                return self._redirect(start_response, "/login")
+            params = parse_qs(environ.get("QUERY_STRING", ""))
+            query = params.get("q", [""])[0]
+            kind = params.get("kind", [""])[0] or None
+            account_raw = params.get("account_id", [""])[0]
+            try:
+                account_id = int(account_raw) if account_raw else None
+                page = max(int(params.get("page", ["1"])[0]), 1)
+            except ValueError:
+                return self._response(start_response, self._search_html(user, query, None, kind, 1, "Invalid account or page."))
+            return self._response(start_response, self._search_html(user, query, account_id, kind, page))
+
         if path == "/report" and method == "POST":
             if user is None:
                 return self._redirect(start_response, "/login")
@@ -153,13 +227,17 @@ class WebApp:
         transactions = self.auth.list_transactions(user.id)
         msg = f"<p style='color:red'>{html.escape(message)}</p>" if message else ""
         rendered = f"<pre>{html.escape(report)}</pre>" if report else ""
+        snapshot = self.auth.build_snapshot(user.id)
+        live_report = render_report(snapshot) if snapshot is not None and snapshot.accounts else ""
+        live = f"<pre>{html.escape(live_report)}</pre>" if live_report else "<p>Add accounts to see allocation drift.</p>"
 
         accounts_list = "".join(
             f"<li>#{a.id} {html.escape(a.name)} ({html.escape(a.account_type)}): ${a.balance:,.2f}</li>" for a in accounts
         ) or "<li>No accounts yet.</li>"
 
         tx_list = "".join(
-            f"<li>#{t.id} [{html.escape(t.kind)}] account={t.account_id} amount=${t.amount:,.2f} - {html.escape(t.description)}</li>"
+            f"<li>#{t.id} {html.escape((t.posted_at or '')[:10])} [{html.escape(t.kind)}] account={t.account_id} "
+            f"amount=${t.amount:,.2f} - {html.escape(t.description)}</li>"
             for t in transactions
         ) or "<li>No transactions yet.</li>"
 
@@ -167,6 +245,12 @@ class WebApp:
             f"<option value='{a.id}'>#{a.id} {html.escape(a.name)}</option>" for a in accounts
         )
 
+        recurring_list = "".join(
+            f"<li>#{r.id} [{html.escape(r.kind)}] {html.escape(r.cadence)} account={r.account_id} "
+            f"amount=${r.amount:,.2f} - {html.escape(r.description)} (next {html.escape(r.next_run_at[:10])})</li>"
+            for r in self.auth.list_recurring_rules(user.id)
+        ) or "<li>No recurring transactions yet.</li>"
+
         sample_json = '{"household":{"id":"fam","name":"My Family","members":[]},"accounts":[],"budget":{"period":"2026-02","shared":{"required":0,"flexible":0},"personal":{}},"asset_segments":[]}'
 
         return f"""
@@ -199,6 +283,47 @@ class WebApp:
             <button type="submit">Add transaction</button>
           </form>
 
+          <h2>Recurring transactions</h2>
+          <ul>{recurring_list}</ul>
+          <form method="post" action="/recurring">
+            <label>Account <select name="account_id">{account_options}</select></label>
+            <label>Kind
+              <select name="kind">
+                <option value="expense">expense</option>
+                <option value="income">income (salary)</option>
+              </select>
+            </label>
+            <label>Cadence
+              <select name="cadence">
+                <option value="monthly">monthly</option>
+                <option value="weekly">weekly</option>
+                <option value="daily">daily</option>
+              </select>
+            </label>
+            <label>Amount <input name="amount" value="0" /></label>
+            <label>Description <input name="description" placeholder="rent / salary / subscription" /></label>
+            <button type="submit">Add recurring transaction</button>
+          </form>
+
+          <form method="get" action="/transactions/search">
+            <label>Search descriptions <input name="q" /></label>
+            <button type="submit">Search</button>
+          </form>
+
+          <h2>Live allocation drift</h2>
+          {live}
+          <form method="post" action="/segments">
+            <label>Segment <input name="name" placeholder="operations / long_term" /></label>
+            <label>Target % <input name="target_pct" value="0" /></label>
+            <button type="submit">Set target</button>
+          </form>
+          <form method="post" action="/allocations">
+            <label>Account <select name="account_id">{account_options}</select></label>
+            <label>Segment <input name="segment" /></label>
+            <label>Allocation % <input name="pct" value="100" /></label>
+            <button type="submit">Set allocation</button>
+          </form>
+
           <h2>Planner report from JSON snapshot</h2>
           <form method="post" action="/report">
             <label>Finance snapshot JSON</label><br/>
@@ -209,6 +334,51 @@ class WebApp:
         </body></html>
         """
 
+    def _search_html(
+        self, user: User, query: str, account_id: int | None, kind: str | None, page: int, message: str = ""
+    ) -> str:
+        results = self.auth.search_transactions(
+            user.id, query, account_id=account_id, kind=kind, limit=SEARCH_PAGE_SIZE + 1, offset=(page - 1) * SEARCH_PAGE_SIZE
+        )
+        has_next = len(results) > SEARCH_PAGE_SIZE
+        msg = f"<p style='color:red'>{html.escape(message)}</p>" if message else ""
+
+        tx_list = "".join(
+            f"<li>#{t.id} [{html.escape(t.kind)}] account={t.account_id} amount=${t.amount:,.2f} - {html.escape(t.description)}</li>"
+            for t in results[:SEARCH_PAGE_SIZE]
+        ) or "<li>No matching transactions.</li>"
+
+        filters = {"q": query, "account_id": "" if account_id is None else str(account_id), "kind": kind or ""}
+        pager = []
+        if page > 1:
+            pager.append(f'<a href="/transactions/search?{html.escape(urlencode({**filters, "page": page - 1}))}">Previous</a>')
+        if has_next:
+            pager.append(f'<a href="/transactions/search?{html.escape(urlencode({**filters, "page": page + 1}))}">Next</a>')
+
+        account_options = "".join(
+            f"<option value='{a.id}'{' selected' if a.id == account_id else ''}>#{a.id} {html.escape(a.name)}</option>"
+            for a in self.auth.list_accounts(user.id)
+        )
+        kind_options = "".join(
+            f"<option value='{k}'{' selected' if k == kind else ''}>{k}</option>" for k in ("income", "expense")
+        )
+
+        return f"""
+        <html><body>
+          <h1>Search transactions</h1>
+          <p><a href="/dashboard">Back to dashboard</a></p>
+          {msg}
+          <form method="get" action="/transactions/search">
+            <label>Description <input name="q" value="{html.escape(query)}" /></label>
+            <label>Account <select name="account_id"><option value="">any</option>{account_options}</select></label>
+            <label>Kind <select name="kind"><option value="">any</option>{kind_options}</select></label>
+            <button type="submit">Search</button>
+          </form>
+          <ul>{tx_list}</ul>
+          <p>Page {page} {" | ".join(pager)}</p>
+        </body></html>
+        """
+
 
 def _post_params(environ):
     length = int(environ.get("CONTENT_LENGTH") or 0)
@@ -227,13 +397,34 @@ def _cookie_value(cookie_header: str, name: str) -> str:
     return ""
 
 
+def _start_recurring_scheduler(store: AuthStore, interval: float) -> threading.Event:
+    stopped = threading.Event()
+
+    def loop() -> None:
+        while not stopped.is_set():
+            try:
+                store.run_recurring()
+            except Exception as exc:  # noqa: BLE001
+                print(f"Recurring transaction run failed: {exc}", file=sys.stderr)
+            stopped.wait(interval)
+
+    threading.Thread(target=loop, name="recurring-scheduler", daemon=True).start()
+    return stopped
+
+
 def run() -> None:
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
-    app = WebApp(os.getenv("FAMILY_FINANCE_DB", "family_finance.db"))
-    with make_server(host, port, app) as server:
-        print(f"Serving Family Finance Planner on http://{host}:{port}")
-        server.serve_forever()
+    app = WebApp(os.getenv("FAMILY_FINANCE_DB", "family_finance.db"), profiler=profiler_from_env(os.environ))
+    interval = float(os.getenv("FAMILY_FINANCE_RECURRING_INTERVAL", "300"))
+    scheduler = _start_recurring_scheduler(app.auth, interval) if interval > 0 else None
+    try:
+        with make_server(host, port, app) as server:
+            print(f"Serving Family Finance Planner on http://{host}:{port}")
+            server.serve_forever()
+    finally:
+        if scheduler is not None:
+            scheduler.set()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,8 @@
+import sqlite3
+from datetime import datetime, timedelta
+
 from family_finance.auth import AuthStore
+from family_finance.planner import segment_drift, total_net_assets
 
 
 def test_register_login_logout_cycle(tmp_path):
@@ -45,3 +49,155 @@ def test_account_and_transaction_management(tmp_path):
 
     tx = store.list_transactions(user.id)
     assert len(tx) == 2
+
+
+def test_search_transactions_filters_and_pages(tmp_path):
+    store = AuthStore(tmp_path / "auth.db")
+    store.register("kim", "pw")
+    store.register("lee", "pw")
+    kim = store.user_for_token(store.authenticate("kim", "pw"))
+    lee = store.user_for_token(store.authenticate("lee", "pw"))
+    store.create_account(kim.id, "Checking", "checking", 0)
+    store.create_account(kim.id, "Savings", "savings", 0)
+    store.create_account(lee.id, "Checking", "checking", 0)
+    checking, savings = store.list_accounts(kim.id)
+    lee_account = store.list_accounts(lee.id)[0]
+
+    store.create_transaction(kim.id, checking.id, "income", 3000, "ACME salary March")
+    imported = store.import_transactions(
+        kim.id,
+        [
+            (checking.id, "expense", 40, "Coffee beans"),
+            (savings.id, "income", 3000, "ACME salary April"),
+            (lee_account.id, "income", 1, "Not kim's account"),
+        ],
+    )
+    store.create_transaction(lee.id, lee_account.id, "income", 100, "ACME salary")
+
+    assert imported == 2
+    assert store.list_accounts(kim.id)[1].balance == 3000
+
+    found = store.search_transactions(kim.id, "acme sal")
+    assert [t.description for t in found] == ["ACME salary April", "ACME salary March"]
+    assert [t.account_id for t in store.search_transactions(kim.id, "salary", account_id=checking.id)] == [checking.id]
+    assert store.search_transactions(kim.id, "salary", kind="expense") == []
+    assert [t.description for t in store.search_transactions(kim.id, "salary", limit=1, offset=1)] == ["ACME salary March"]
+    assert store.search_transactions(kim.id, '" OR *') == []
+
+    store.rebuild_search_index()
+    assert len(store.search_transactions(kim.id, "coffee")) == 1
+
+
+def test_build_snapshot_from_store_and_cache_invalidation(tmp_path):
+    store = AuthStore(tmp_path / "auth.db")
+    store.register("ana", "pw")
+    user = store.user_for_token(store.authenticate("ana", "pw"))
+    store.create_account(user.id, "Checking", "checking", 10000)
+    store.create_account(user.id, "Brokerage", "brokerage", 90000)
+    checking, brokerage = store.list_accounts(user.id)
+
+    assert store.set_segment_target(user.id, "operations", 20) is True
+    assert store.set_segment_target(user.id, "long_term", 80) is True
+    assert store.set_account_allocation(user.id, brokerage.id, "long_term", 100) is True
+    assert store.set_account_allocation(user.id, 999, "long_term", 100) is False
+
+    snapshot = store.build_snapshot(user.id)
+    assert segment_drift(snapshot) == {"operations": -10000, "long_term": 10000}
+    assert snapshot.account_segment_allocations[str(checking.id)] == {"operations": 100.0}
+    assert store.build_snapshot(user.id) is snapshot
+
+    store.create_transaction(user.id, checking.id, "income", 5000, "Bonus")
+    refreshed = AuthStore(tmp_path / "auth.db").build_snapshot(user.id)
+    assert store.build_snapshot(user.id) is not snapshot
+    assert total_net_assets(refreshed) == 105000
+
+
+def test_balance_as_of_and_series_use_posting_dates(tmp_path):
+    store = AuthStore(tmp_path / "auth.db")
+    store.register("eva", "pw")
+    user = store.user_for_token(store.authenticate("eva", "pw"))
+    store.create_account(user.id, "Checking", "checking", 1000)
+    account = store.list_accounts(user.id)[0]
+
+    store.import_transactions(
+        user.id,
+        [
+            (account.id, "income", 3000, "Salary", datetime(2026, 1, 25)),
+            (account.id, "expense", 1200, "Rent", datetime(2026, 2, 1, 9)),
+            (account.id, "expense", 100, "Groceries", datetime(2026, 3, 5)),
+        ],
+    )
+    store.create_transaction(user.id, account.id, "income", 50, "Refund", posted_at=datetime(2026, 2, 10))
+
+    assert store.balance_as_of(user.id, account.id, datetime(2026, 1, 31)) == 4000
+    assert store.balance_as_of(user.id, account.id, datetime(2026, 2, 28)) == 2850
+    assert store.balance_as_of(user.id, account.id, datetime(2025, 12, 31)) == 1000
+    assert store.balance_as_of(user.id + 1, account.id, datetime(2026, 2, 28)) is None
+
+    series = store.balance_series(user.id, account.id, datetime(2026, 1, 1), datetime(2026, 3, 31))
+    assert series == [("2026-01-31T23:59:59", 4000), ("2026-02-28T23:59:59", 2850), ("2026-03-31T23:59:59", 2750)]
+    assert store.list_accounts(user.id)[0].balance == 2750
+
+
+def test_backfill_ledger_dates_legacy_rows(tmp_path):
+    store = AuthStore(tmp_path / "auth.db")
+    store.register("old", "pw")
+    user = store.user_for_token(store.authenticate("old", "pw"))
+    store.create_account(user.id, "Savings", "savings", 500)
+    account = store.list_accounts(user.id)[0]
+    store.create_transaction(user.id, account.id, "income", 250, "Interest")
+    with sqlite3.connect(tmp_path / "auth.db") as conn:
+        conn.execute("UPDATE transactions SET posted_at = NULL")
+        conn.execute("DELETE FROM balance_checkpoints")
+
+    assert store.balance_as_of(user.id, account.id, datetime(2025, 7, 1)) is None
+    assert store.balance_series(user.id, account.id, datetime(2025, 6, 1), datetime(2025, 7, 31)) == []
+
+    assert store.backfill_ledger(datetime(2025, 6, 15)) == 1
+    assert store.list_transactions(user.id)[0].posted_at == "2025-06-15T00:00:00"
+    assert store.balance_as_of(user.id, account.id, datetime(2025, 6, 1)) == 500
+    assert store.balance_as_of(user.id, account.id, datetime(2025, 7, 1)) == 750
+    assert store.balance_series(user.id, account.id, datetime(2025, 6, 1), datetime(2025, 7, 31))[-1][1] == 750
+
+
+def test_run_recurring_catches_up_without_duplicates(tmp_path):
+    store = AuthStore(tmp_path / "auth.db")
+    store.register("rob", "pw")
+    user = store.user_for_token(store.authenticate("rob", "pw"))
+    store.create_account(user.id, "Checking", "checking", 0)
+    account = store.list_accounts(user.id)[0]
+
+    assert store.create_recurring_rule(user.id, account.id, "income", 3000, "Salary", "monthly", datetime(2026, 1, 31))
+    assert store.create_recurring_rule(user.id, account.id, "expense", 1000, "Rent", "weekly", datetime(2026, 3, 1))
+    assert not store.create_recurring_rule(user.id, account.id, "expense", 10, "Gym", "yearly")
+
+    assert store.run_recurring(datetime(2026, 3, 10), batch_size=1) == 4
+    assert store.run_recurring(datetime(2026, 3, 10)) == 0
+    assert store.run_recurring(datetime(2026, 3, 31)) == 4
+
+    salary_dates = [t.posted_at for t in store.list_transactions(user.id) if t.description == "Salary"]
+    assert sorted(salary_dates) == ["2026-01-31T00:00:00", "2026-02-28T00:00:00", "2026-03-31T00:00:00"]
+    assert store.list_accounts(user.id)[0].balance == 9000 - 5000
+    assert store.balance_as_of(user.id, account.id, datetime(2026, 2, 28, 12)) == 6000
+    assert store.list_recurring_rules(user.id)[0].next_run_at == "2026-04-30T00:00:00"
+
+
+def test_backdated_import_creates_historical_checkpoints(tmp_path):
+    store = AuthStore(tmp_path / "auth.db")
+    store.register("hal", "pw")
+    user = store.user_for_token(store.authenticate("hal", "pw"))
+    store.create_account(user.id, "Checking", "checking", 100)
+    account = store.list_accounts(user.id)[0]
+
+    rows = [(account.id, "income", 10, "Daily", datetime(2016, 1, 1) + timedelta(days=i)) for i in range(3650)]
+    store.import_transactions(user.id, rows)
+    store.create_transaction(user.id, account.id, "expense", 5, "Late fee", posted_at=datetime(2016, 1, 10, 12))
+
+    with sqlite3.connect(tmp_path / "auth.db") as conn:
+        historical = conn.execute(
+            "SELECT checkpoint_at, balance FROM balance_checkpoints WHERE account_id = ? AND checkpoint_at < '2026-01-01'",
+            (account.id,),
+        ).fetchall()
+    assert len(historical) >= 119
+    assert ("2016-02-01T00:00:00", 100 + 31 * 10 - 5) in historical
+    assert store.balance_as_of(user.id, account.id, datetime(2020, 6, 15, 12)) == 100 + 1628 * 10 - 5
@@ -0,0 +1,67 @@
+import json
+import struct
+from dataclasses import replace
+
+from family_finance.history import SnapshotHistory, load_snapshot_directory
+from family_finance.models import Account
+from family_finance.packed import write_packed_snapshot
+from family_finance.planner import load_snapshot_from_json
+
+from test_planner import SAMPLE
+
+
+def _snapshot(period, brokerage_balance):
+    payload = json.loads(SAMPLE)
+    payload["budget"]["period"] = period
+    payload["accounts"][1]["balance"] = brokerage_balance
+    return load_snapshot_from_json(json.dumps(payload))
+
+
+def test_trends_come_from_recorded_periods(tmp_path):
+    history = SnapshotHistory(tmp_path / "history.db")
+    history.record_many([(_snapshot("2026-03", 110000), None), (_snapshot("2026-01", 90000), None)])
+    history.record(_snapshot("2026-02", 100000))
+
+    trend = history.net_assets_trend("fam_001", start="2026-02")
+    assert [(p.period, p.net_assets) for p in trend] == [("2026-02", 110000), ("2026-03", 120000)]
+
+    drift = history.segment_drift_trend("fam_001", segment="long_term")
+    assert [(p.period, p.drift) for p in drift["long_term"]] == [
+        ("2026-01", 10000),
+        ("2026-02", 12000),
+        ("2026-03", 14000),
+    ]
+
+
+def test_account_deltas_reconstruct_each_period(tmp_path):
+    history = SnapshotHistory(tmp_path / "history.db")
+    first = _snapshot("2026-01", 90000)
+    second = replace(
+        _snapshot("2026-02", 95000),
+        accounts=[_snapshot("2026-02", 95000).accounts[1], Account("acc_new", "savings", ["u_anna"], 500)],
+        account_segment_allocations={"acc_brokerage": {"long_term": 100.0}, "acc_new": {"operations": 100.0}},
+    )
+    history.record_many([(first, None), (second, None)])
+
+    assert history.snapshot_at("fam_001", "2026-01") == first
+    assert history.snapshot_at("fam_001", "2026-02") == second
+    assert history.snapshot_at("fam_001", "2026-04") is None
+
+
+def test_load_snapshot_directory_skips_stray_files(tmp_path):
+    (tmp_path / "2026-01.json").write_text(SAMPLE, encoding="utf-8")
+    (tmp_path / "README").write_text("not a snapshot", encoding="utf-8")
+    (tmp_path / ".DS_Store").write_bytes(b"\x00\x00\x00\x01Bud1")
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    (tmp_path / "wrong_shape.json").write_text('{"household":{"id":"x","name":"y"},"budget":[]}', encoding="utf-8")
+    write_packed_snapshot(_snapshot("2026-02", 1), tmp_path / "bad_refs.ffs")
+    corrupt = bytearray((tmp_path / "bad_refs.ffs").read_bytes())
+    _, _, _, n_accounts, n_segments, n_declared, _, n_personal, _, _ = struct.unpack_from("<8sB7xIIIIIIII", corrupt)
+    refs_at = 48 + 8 * (n_accounts * (1 + n_segments) + n_declared + 2 + n_personal)
+    corrupt[refs_at + 4 * 3 : refs_at + 4 * 4] = struct.pack("<I", 9999)  # first account id
+    (tmp_path / "bad_refs.ffs").write_bytes(bytes(corrupt))
+
+    entries, skipped = load_snapshot_directory(tmp_path, period_from_filename=True)
+
+    assert [period for _, period in entries] == ["2026-01"]
+    assert sorted(path.name for path, _ in skipped) == [".DS_Store", "README", "bad_refs.ffs", "broken.json", "wrong_shape.json"]
@@ -0,0 +1,26 @@
+from family_finance.auth import AuthStore
+from family_finance.loadtest import run_load_test, seed_database
+
+
+def test_seed_database_creates_users_accounts_and_transactions(tmp_path):
+    usernames = seed_database(tmp_path / "load.db", users=2, accounts_per_user=2, transactions_per_account=5)
+
+    store = AuthStore(tmp_path / "load.db")
+    user = store.user_for_token(store.authenticate(usernames[0], "loadtest-pw"))
+    assert usernames == ["load_user_0", "load_user_1"]
+    assert len(store.list_accounts(user.id)) == 2
+    assert len(store.list_transactions(user.id)) == 10
+    assert seed_database(tmp_path / "load.db", users=2) == usernames
+
+
+def test_in_process_load_test_reports_per_route_latency(tmp_path):
+    usernames = seed_database(tmp_path / "load.db", users=2, accounts_per_user=1, transactions_per_account=3)
+
+    report = run_load_test(tmp_path / "load.db", usernames, clients=2, requests_per_client=10)
+
+    assert report["total"]["requests"] == 20
+    assert report["total"]["errors"] == 0
+    assert set(report["routes"]) == {"login", "dashboard", "transaction", "report"}
+    for stats in report["routes"].values():
+        if stats["requests"]:
+            assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
@@ -0,0 +1,81 @@
+import sys
+
+from family_finance import cli
+from family_finance.packed import PackedSnapshot, is_packed_snapshot, open_packed_snapshot, write_packed_snapshot
+from family_finance.planner import (
+    load_snapshot_from_json,
+    planned_monthly_budget_total,
+    render_report,
+    segment_current_amounts,
+    segment_drift,
+    segment_target_amounts,
+    total_net_assets,
+)
+
+from test_planner import SAMPLE
+
+
+def test_packed_aggregates_match_planner(tmp_path):
+    snapshot = load_snapshot_from_json(SAMPLE)
+    path = tmp_path / "snapshot.ffs"
+    write_packed_snapshot(snapshot, path)
+
+    assert is_packed_snapshot(path)
+    with open_packed_snapshot(path) as packed:
+        assert packed.total_net_assets() == total_net_assets(snapshot)
+        assert packed.planned_monthly_budget_total() == planned_monthly_budget_total(snapshot)
+        assert packed.segment_target_amounts() == segment_target_amounts(snapshot)
+        assert packed.segment_current_amounts() == segment_current_amounts(snapshot)
+        assert packed.segment_drift() == segment_drift(snapshot)
+
+
+def test_packed_round_trip_preserves_report(tmp_path):
+    snapshot = load_snapshot_from_json(SAMPLE)
+    path = tmp_path / "snapshot.ffs"
+    write_packed_snapshot(snapshot, path)
+
+    with open_packed_snapshot(path) as packed:
+        restored = packed.to_snapshot()
+
+    assert restored == snapshot
+    assert render_report(restored) == render_report(snapshot)
+
+
+def test_json_input_is_not_detected_as_packed(tmp_path):
+    path = tmp_path / "snapshot.json"
+    path.write_text(SAMPLE, encoding="utf-8")
+
+    assert not is_packed_snapshot(path)
+
+
+def test_close_with_caller_held_views(tmp_path):
+    path = tmp_path / "snapshot.ffs"
+    write_packed_snapshot(load_snapshot_from_json(SAMPLE), path)
+
+    with open_packed_snapshot(path) as packed:
+        head = packed.balances[0:1]
+        nested = memoryview(packed.allocations)
+    packed.close()
+
+    assert head[0] == 10000
+    assert nested.tolist()[0] == 100
+
+
+def test_cli_reports_packed_input_from_buffers(tmp_path, monkeypatch, capsys):
+    json_path = tmp_path / "snapshot.json"
+    json_path.write_text(SAMPLE, encoding="utf-8")
+    packed_path = tmp_path / "snapshot.ffs"
+    write_packed_snapshot(load_snapshot_from_json(SAMPLE), packed_path)
+
+    monkeypatch.setattr(sys, "argv", ["family-finance", str(json_path)])
+    cli.main()
+    json_report = capsys.readouterr().out
+
+    def fail(self):
+        raise AssertionError("packed report must not materialize the snapshot")
+
+    monkeypatch.setattr(PackedSnapshot, "to_snapshot", fail)
+    monkeypatch.setattr(sys, "argv", ["family-finance", str(packed_path)])
+    cli.main()
+
+    assert capsys.readouterr().out == json_report
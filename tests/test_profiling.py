@@ -0,0 +1,38 @@
+import pytest
+
+from family_finance.profiling import Profiler
+
+
+def _work():
+    return sum(i * i for i in range(200000))
+
+
+def test_profiled_call_writes_pstats_and_collapsed(tmp_path):
+    profiler = Profiler(tmp_path / "profiles", sample_interval=0.0005)
+
+    assert profiler.run("GET /report", _work) == _work()
+
+    pstats_files = list((tmp_path / "profiles").glob("*.pstats"))
+    collapsed_files = list((tmp_path / "profiles").glob("*.collapsed"))
+    assert len(pstats_files) == 1
+    assert pstats_files[0].stem.endswith("GET_report")
+    assert len(collapsed_files) == 1
+    assert "_work" in collapsed_files[0].read_text(encoding="utf-8")
+
+
+def test_profile_retention_and_opt_in(tmp_path):
+    profiler = Profiler(tmp_path / "profiles", keep=2)
+    for _ in range(4):
+        profiler.run("cli", _work)
+
+    assert len(list((tmp_path / "profiles").glob("*.pstats"))) == 2
+    assert len(list((tmp_path / "profiles").glob("*.collapsed"))) == 2
+    assert profiler.should_profile({"HTTP_X_PROFILE": "1"})
+    assert profiler.should_profile({"QUERY_STRING": "q=rent&profile=1"})
+    assert not profiler.should_profile({"QUERY_STRING": "profile=10"})
+
+
+def test_profiler_rejects_keep_below_one(tmp_path):
+    with pytest.raises(ValueError):
+        Profiler(tmp_path / "profiles", keep=0)
+    assert not (tmp_path / "profiles").exists()
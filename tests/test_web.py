@@ -1,14 +1,17 @@
+from datetime import datetime
 from io import BytesIO
 from urllib.parse import urlencode
 
+from family_finance.profiling import Profiler
 from family_finance.web import WebApp
 
 
-def _call(app, path='/', method='GET', data='', cookie=''):
+def _call(app, path='/', method='GET', data='', cookie='', query=''):
     body = data.encode('utf-8')
     environ = {
         'PATH_INFO': path,
         'REQUEST_METHOD': method,
+        'QUERY_STRING': query,
         'CONTENT_LENGTH': str(len(body)),
         'wsgi.input': BytesIO(body),
         'HTTP_COOKIE': cookie,
@@ -58,3 +61,89 @@ def test_manage_accounts_and_transactions_ui(tmp_path):
     assert status.startswith('200')
     assert 'Checking (checking): $3,500.00' in payload
     assert 'Salary' in payload
+
+
+def test_search_transactions_ui(tmp_path):
+    app = WebApp(tmp_path / 'web.db')
+    _call(app, '/register', 'POST', 'username=ivy&password=secret')
+    _, headers, _ = _call(app, '/login', 'POST', 'username=ivy&password=secret')
+    cookie = headers['Set-Cookie'].split(';', maxsplit=1)[0]
+    _call(app, '/accounts', 'POST', urlencode({'name': 'Checking', 'account_type': 'checking'}), cookie=cookie)
+    for description in ('Monthly salary', 'Groceries market'):
+        tx_payload = urlencode({'account_id': '1', 'kind': 'expense', 'amount': '10', 'description': description})
+        _call(app, '/transactions', 'POST', tx_payload, cookie=cookie)
+
+    status, _, payload = _call(app, '/transactions/search', 'GET', cookie=cookie, query=urlencode({'q': 'groc'}))
+    assert status.startswith('200')
+    assert 'Groceries market' in payload
+    assert 'Monthly salary' not in payload
+
+
+def test_profiled_request_writes_profile(tmp_path):
+    app = WebApp(tmp_path / 'web.db', profiler=Profiler(tmp_path / 'profiles'))
+
+    status, _, _ = _call(app, '/login', 'GET')
+    assert status.startswith('200')
+    assert list((tmp_path / 'profiles').glob('*.pstats')) == []
+
+    status, _, payload = _call(app, '/login', 'GET', query='profile=1')
+    assert status.startswith('200')
+    assert 'Sign in' in payload
+    assert len(list((tmp_path / 'profiles').glob('*-GET_login.pstats'))) == 1
+
+
+def test_dashboard_shows_live_drift_from_stored_allocations(tmp_path):
+    app = WebApp(tmp_path / 'web.db')
+    _call(app, '/register', 'POST', 'username=max&password=secret')
+    _, headers, _ = _call(app, '/login', 'POST', 'username=max&password=secret')
+    cookie = headers['Set-Cookie'].split(';', maxsplit=1)[0]
+    _call(app, '/accounts', 'POST', urlencode({'name': 'Brokerage', 'account_type': 'brokerage', 'opening_balance': '1000'}), cookie=cookie)
+
+    status, _, _ = _call(app, '/segments', 'POST', urlencode({'name': 'long_term', 'target_pct': '50'}), cookie=cookie)
+    assert status.startswith('302')
+    allocation = urlencode({'account_id': '1', 'segment': 'long_term', 'pct': '100'})
+    status, _, _ = _call(app, '/allocations', 'POST', allocation, cookie=cookie)
+    assert status.startswith('302')
+
+    status, _, payload = _call(app, '/dashboard', 'GET', cookie=cookie)
+    assert status.startswith('200')
+    assert 'long_term: current=$1,000.00, target=$500.00, drift=$500.00' in payload
+
+
+def test_recurring_transactions_ui_posts_due_occurrences(tmp_path):
+    app = WebApp(tmp_path / 'web.db')
+    _call(app, '/register', 'POST', 'username=zoe&password=secret')
+    _, headers, _ = _call(app, '/login', 'POST', 'username=zoe&password=secret')
+    cookie = headers['Set-Cookie'].split(';', maxsplit=1)[0]
+    _call(app, '/accounts', 'POST', urlencode({'name': 'Checking', 'account_type': 'checking'}), cookie=cookie)
+
+    rule = urlencode({'account_id': '1', 'kind': 'expense', 'amount': '15', 'description': 'Streaming', 'cadence': 'monthly'})
+    status, _, _ = _call(app, '/recurring', 'POST', rule, cookie=cookie)
+    assert status.startswith('302')
+
+    status, _, payload = _call(app, '/dashboard', 'GET', cookie=cookie)
+    assert status.startswith('200')
+    assert 'monthly account=1 amount=$15.00 - Streaming' in payload
+    assert 'Checking (checking): $-15.00' in payload
+
+
+def test_recurring_post_does_not_run_other_users_rules(tmp_path):
+    app = WebApp(tmp_path / 'web.db')
+    app.auth.register('old', 'pw')
+    other = app.auth.user_for_token(app.auth.authenticate('old', 'pw'))
+    app.auth.create_account(other.id, 'Checking', 'checking', 0)
+    other_account = app.auth.list_accounts(other.id)[0]
+    app.auth.create_recurring_rule(other.id, other_account.id, 'expense', 1, 'Daily', 'daily', datetime(2016, 1, 1))
+
+    _call(app, '/register', 'POST', 'username=z&password=secret')
+    _, headers, _ = _call(app, '/login', 'POST', 'username=z&password=secret')
+    cookie = headers['Set-Cookie'].split(';', maxsplit=1)[0]
+    _call(app, '/accounts', 'POST', urlencode({'name': 'Checking', 'account_type': 'checking'}), cookie=cookie)
+    rule = urlencode({'account_id': '2', 'kind': 'expense', 'amount': '15', 'description': 'Streaming', 'cadence': 'monthly'})
+    status, _, _ = _call(app, '/recurring', 'POST', rule, cookie=cookie)
+
+    assert status.startswith('302')
+    assert app.auth.list_transactions(other.id) == []
+    assert app.auth.list_recurring_rules(other.id)[0].next_run_at == '2016-01-01T00:00:00'
+    z = app.auth.user_for_token(cookie.split('=', 1)[1])
+    assert [t.description for t in app.auth.list_transactions(z.id)] == ['Streaming']